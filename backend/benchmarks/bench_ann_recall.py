@@ -0,0 +1,59 @@
+"""Recall@k and latency of the IVF index against exact (brute-force) search.
+
+Run from the backend directory:
+    python benchmarks/bench_ann_recall.py                 # synthetic clustered corpus
+    python benchmarks/bench_ann_recall.py --size 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ann_index import IVFIndex  # noqa: E402
+from services.search_ranking import normalize_rows, top_k_indices  # noqa: E402
+
+DIM = 384
+
+
+def synthetic_corpus(n, rng, topics=500):
+    # Embeddings of real text are clustered by topic, so sample around topic centres
+    centres = rng.standard_normal((topics, DIM), dtype=np.float32)
+    labels = rng.integers(topics, size=n)
+    return normalize_rows(centres[labels] + 0.35 * rng.standard_normal((n, DIM), dtype=np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = synthetic_corpus(args.size, rng)
+    queries = normalize_rows(corpus[rng.choice(args.size, args.queries)] + 0.3 * rng.standard_normal((args.queries, DIM), dtype=np.float32))
+
+    started = time.perf_counter()
+    index = IVFIndex.build(corpus)
+    print(f"Built IVF index: {args.size} vectors, {index.nlist} lists in {time.perf_counter() - started:.1f}s\n")
+
+    started = time.perf_counter()
+    exact = [set(top_k_indices(corpus @ q, args.k).tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / args.queries
+
+    print(f"{'search':>10} | {'recall@' + str(args.k):>9} | {'ms/query':>8} | speedup")
+    print(f"{'exact':>10} | {1.0:>9.3f} | {exact_ms:>8.3f} | 1.0x")
+    for nprobe in (1, 2, 4, 8, 16, 32):
+        started = time.perf_counter()
+        found = [set(index.search(q, corpus, args.k, nprobe=nprobe)[0].tolist()) for q in queries]
+        ann_ms = (time.perf_counter() - started) * 1000 / args.queries
+        recall = np.mean([len(f & e) / args.k for f, e in zip(found, exact)])
+        print(f"{'nprobe=' + str(nprobe):>10} | {recall:>9.3f} | {ann_ms:>8.3f} | {exact_ms / ann_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
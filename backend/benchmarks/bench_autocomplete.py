@@ -0,0 +1,103 @@
+"""Type-ahead latency: linear scan (previous suggest_plants) vs the bisect autocomplete index,
+plus typo queries: scoring every name by edit distance vs the trigram fuzzy index.
+
+Run from the backend directory:
+    python benchmarks/bench_autocomplete.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.autocomplete import AutocompleteIndex, normalize_name  # noqa: E402
+from services.fuzzy_index import FuzzyNameIndex, max_typos, typed_distance  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+PREFIXES = ["a", "as", "ash", "tul", "neem", "zz", "m", "bra", "gi", "hol"]
+
+
+def random_word(rng, lo=3, hi=10):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(lo, hi)))
+
+
+def synthetic_plants(n, rng):
+    return [
+        {
+            "common_name": f"{random_word(rng).title()} {random_word(rng)}",
+            "botanical_name": f"{random_word(rng).title()} {random_word(rng)}",
+            "other_names": [random_word(rng).title() for _ in range(2)],
+        }
+        for _ in range(n)
+    ]
+
+
+def linear_suggest(plants, query):
+    matches = []
+    for plant in plants:
+        common = plant.get("common_name", "").lower()
+        botanical = plant.get("botanical_name", "").lower()
+        if common.startswith(query) or botanical.startswith(query):
+            matches.append({"common_name": plant.get("common_name", ""), "botanical_name": plant.get("botanical_name", "")})
+    return matches[:10]
+
+
+def typo_queries(plants, rng, count=10):
+    """Names from the corpus with one or two random character edits."""
+    queries = []
+    for plant in rng.sample(plants, count):
+        word = list(plant["common_name"].lower().split(" ")[0])
+        for _ in range(rng.randint(1, 2)):
+            word[rng.randrange(len(word))] = rng.choice(string.ascii_lowercase)
+        queries.append("".join(word))
+    return queries
+
+
+def linear_fuzzy(names, query):
+    allowed = max_typos(query)
+    scored = sorted((typed_distance(query, name, allowed), name) for name in names)
+    return [name for distance, name in scored[:10] if distance <= allowed]
+
+
+def per_query_ms(fn, queries=PREFIXES, repeats=20):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - started) * 1000 / (repeats * len(queries))
+
+
+def main():
+    rng = random.Random(7)
+    print("Prefix suggestions")
+    print(f"{'plants':>8} | {'names':>7} | {'build ms':>8} | {'scan ms/q':>9} | {'index ms/q':>10}")
+    corpora = []
+    for n in SIZES:
+        plants = synthetic_plants(n, rng)
+        started = time.perf_counter()
+        index = AutocompleteIndex(plants)
+        build_ms = (time.perf_counter() - started) * 1000
+        scan = per_query_ms(lambda q: linear_suggest(plants, q), repeats=2)
+        fast = per_query_ms(lambda q: index.suggest(q))
+        print(f"{n:>8} | {n * 4:>7} | {build_ms:>8.0f} | {scan:>9.2f} | {fast:>10.4f}")
+        corpora.append(plants)
+
+    print("\nTypo suggestions (1-2 edits)")
+    print(f"{'plants':>8} | {'build ms':>8} | {'scan ms/q':>9} | {'index ms/q':>10} | {'found':>5}")
+    for plants in corpora:
+        entries = [(normalize_name(p[field]), 0, i) for i, p in enumerate(plants) for field in ("common_name", "botanical_name")]
+        started = time.perf_counter()
+        fuzzy = FuzzyNameIndex(entries)
+        build_ms = (time.perf_counter() - started) * 1000
+        queries = typo_queries(plants, rng)
+        names = [name for name, _, _ in entries]
+        scan = per_query_ms(lambda q: linear_fuzzy(names, q), queries, repeats=1)
+        fast = per_query_ms(lambda q: fuzzy.suggest_positions(q), queries)
+        found = sum(bool(fuzzy.suggest_positions(q)) for q in queries)
+        print(f"{len(plants):>8} | {build_ms:>8.0f} | {scan:>9.1f} | {fast:>10.3f} | {found:>2}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Cart hydration: one find_one per cart item (previous get_cart) vs one $in query per category.
+
+Runs against mongomock, which has no network, so every query is charged a simulated
+round-trip (MONGO_RTT_MS, default 0.5 ms, roughly a same-region mongod). Set
+BENCH_MONGO_URI to run against a real server instead (uses a scratch database).
+mongomock scans instead of using the _id index, which inflates both columns alike.
+Run from the backend directory:
+    python benchmarks/bench_cart_hydration.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cart_hydration import hydrate_cart, valid_cart_items  # noqa: E402
+
+CART_SIZES = (10, 100, 1000)
+PRODUCTS_PER_CATEGORY = 1_000
+CATEGORIES = {"plant": "plants", "seed": "seeds", "skincare": "skincare",
+              "accessory": "accessories", "medicine": "medicines"}
+RTT_MS = float(os.getenv("MONGO_RTT_MS", "0.5"))
+REPEATS = 3
+
+
+class RoundTripCounter:
+    """Wraps a collection, counting (and for mongomock, simulating) one round-trip per query."""
+
+    def __init__(self, collection, rtt):
+        self._collection = collection
+        self._rtt = rtt
+        self.round_trips = 0
+
+    def _charge(self):
+        self.round_trips += 1
+        if self._rtt:
+            time.sleep(self._rtt)
+
+    def find_one(self, *args, **kwargs):
+        self._charge()
+        return self._collection.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        self._charge()
+        return list(self._collection.find(*args, **kwargs))
+
+
+def database():
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        from pymongo import MongoClient
+        client = MongoClient(uri)
+        client.drop_database("bench_cart_hydration")
+        return client["bench_cart_hydration"], 0.0
+    import mongomock
+    return mongomock.MongoClient()["bench_cart_hydration"], RTT_MS / 1000
+
+
+def n_plus_one(cart, collection_for):
+    # What get_cart used to do
+    cart_items = []
+    for item in valid_cart_items(cart):
+        collection = collection_for(item["category"])
+        if collection is None:
+            continue
+        product = collection.find_one({"_id": item["product_id"]})
+        if not product:
+            continue
+        cart_items.append({"_id": str(product["_id"]), "name": product.get("name", "Unknown"),
+                           "quantity": item.get("quantity", 0)})
+    return cart_items
+
+
+def main():
+    rng = random.Random(7)
+    db, rtt = database()
+    collections = {}
+    for category, name in CATEGORIES.items():
+        db[name].insert_many([
+            {"_id": f"{category}-{i}", "name": f"{category.title()} {i}", "price": rng.randint(50, 2000),
+             "image": f"https://example.com/{category}/{i}.jpg", "category": category,
+             "stock": rng.randint(0, 100), "description": "x" * 400}
+            for i in range(PRODUCTS_PER_CATEGORY)
+        ])
+        collections[category] = RoundTripCounter(db[name], rtt)
+
+    print(f"{'items':>6} | {'approach':<22} | {'round-trips':>11} | {'ms':>9} | {'missing':>7}")
+    for size in CART_SIZES:
+        cart = []
+        for _ in range(size):
+            category = rng.choice(list(CATEGORIES))
+            cart.append({"product_id": f"{category}-{rng.randrange(PRODUCTS_PER_CATEGORY)}",
+                         "category": category, "quantity": rng.randint(1, 3)})
+        # a product deleted since it was added
+        cart.append({"product_id": "plant-deleted", "category": "plant", "quantity": 1})
+
+        for label, fn in (("find_one per item", lambda: (n_plus_one(cart, collections.get), None)),
+                          ("$in per category", lambda: hydrate_cart(cart, collections.get))):
+            for c in collections.values():
+                c.round_trips = 0
+            started = time.perf_counter()
+            for _ in range(REPEATS):
+                _, missing = fn()
+            ms = (time.perf_counter() - started) * 1000 / REPEATS
+            round_trips = sum(c.round_trips for c in collections.values()) // REPEATS
+            reported = "-" if missing is None else len(missing)
+            print(f"{size:>6} | {label:<22} | {round_trips:>11} | {ms:>9.2f} | {reported:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Heatmap payload size and latency: per-request Folium HTML vs JSON values + cached geometry.
+
+Uses INDIA_GEOJSON_PATH if it points at a real file, otherwise a synthetic 36-state
+GeoJSON with smooth, densely sampled borders. Run from the backend directory:
+    python benchmarks/bench_heatmap_payload.py
+"""
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPEATS = 5
+
+
+def synthetic_geojson(path, states=36, vertices=4000, seed=3):
+    rng = random.Random(seed)
+    features = []
+    for i in range(states):
+        cx, cy = 70 + (i % 6) * 4, 8 + (i // 6) * 4
+        # a few low-frequency wobbles so the border is not a trivial circle
+        wobbles = [(rng.uniform(0.05, 0.3), rng.randint(2, 9), rng.uniform(0, 6.28)) for _ in range(4)]
+        ring = []
+        for k in range(vertices):
+            a = 2 * math.pi * k / vertices
+            r = 1.7 + sum(amp * math.sin(freq * a + phase) for amp, freq, phase in wobbles) / 4
+            ring.append([round(cx + r * math.cos(a), 6), round(cy + r * math.sin(a), 6)])
+        ring.append(ring[0])
+        features.append({"type": "Feature", "properties": {"NAME_1": f"State {i}"},
+                         "geometry": {"type": "Polygon", "coordinates": [ring]}})
+    with open(path, "w") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def timed(fn, repeats=REPEATS):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - started) * 1000 / repeats
+
+
+def main():
+    path = os.getenv("INDIA_GEOJSON_PATH")
+    if not path or not os.path.exists(path):
+        path = os.path.join(tempfile.mkdtemp(), "india.geojson")
+        synthetic_geojson(path)
+        os.environ["INDIA_GEOJSON_PATH"] = path
+        print(f"Using synthetic geometry: {path}")
+
+    import folium  # noqa: E402
+    import geopandas as gpd  # noqa: E402
+    import pandas as pd  # noqa: E402
+    from services import state_map  # noqa: E402
+
+    state_names = list(gpd.read_file(path)["NAME_1"])
+    where_grown = {name: round(random.random(), 2) for name in state_names[::3]}
+
+    def legacy_request():
+        # What every /api/state-heatmap request used to do (minus the loopback HTTP call)
+        gdf = gpd.read_file(path)
+        df = pd.DataFrame(list(where_grown.items()), columns=["NAME_1", "Value"])
+        merged = gdf.merge(df, on="NAME_1", how="left")
+        merged["Value"] = merged["Value"].fillna(0)
+        m = folium.Map(location=[20.5937, 78.9629], zoom_start=5, tiles="OpenStreetMap")
+        folium.Choropleth(geo_data=merged, data=merged, columns=["NAME_1", "Value"],
+                          key_on="feature.properties.NAME_1", fill_color="YlGnBu").add_to(m)
+        with tempfile.NamedTemporaryFile(suffix=".html") as f:
+            m.save(f.name)
+            return os.path.getsize(f.name)
+
+    legacy_size, legacy_ms = timed(legacy_request)
+    geometry, load_ms = timed(state_map.get_state_geometry, repeats=1)
+    html, html_ms = timed(lambda: state_map.render_heatmap_html("Benchmark", where_grown))
+    payload, json_ms = timed(lambda: json.dumps({
+        "plant": "Benchmark", "values": state_map.heatmap_values(where_grown),
+        "geometry_version": geometry.version,
+        "geometry_url": f"/api/state-geometry/{geometry.version}.geojson",
+    }).encode(), repeats=1000)
+    state_map.heatmaps.get("Benchmark", where_grown, "bench")
+    _, cached_ms = timed(lambda: state_map.heatmaps.get("Benchmark", where_grown, "bench"), repeats=1000)
+    (body, gzipped), geometry_ms = timed(geometry.geojson_bytes, repeats=1)
+
+    source_size = os.path.getsize(path)
+    html_bytes = html.encode()
+    print(f"\n{'path':<42} | {'bytes':>10} | {'gzip':>9} | {'ms/request':>10}")
+    rows = [
+        ("legacy: read+merge+folium+temp file", legacy_size, None, legacy_ms),
+        ("html, simplified geometry (cache miss)", len(html_bytes), len(gzip.compress(html_bytes)), html_ms),
+        ("html, cached per plant", len(html_bytes), len(gzip.compress(html_bytes)), cached_ms),
+        ("json values (per plant)", len(payload), len(gzip.compress(payload)), json_ms),
+    ]
+    for name, size, gz, ms in rows:
+        print(f"{name:<42} | {size:>10,} | {gz if gz is not None else '-':>9} | {ms:>10.3f}")
+    print("\nGeometry, fetched once per version and cached by the client for a year:")
+    print(f"  source GeoJSON        {source_size:>10,} bytes")
+    print(f"  simplified+quantized  {len(body):>10,} bytes ({len(gzipped):,} gzipped), built in {geometry_ms:.0f} ms")
+    print(f"  process load+simplify {load_ms:>10.0f} ms (once per worker)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Product search latency on a synthetic 50k-product catalogue: unanchored case-insensitive
+regex over every name (what the five $regex queries did, minus the round-trips) vs the
+in-process inverted index.
+
+Run from the backend directory:
+    python benchmarks/bench_product_search.py
+"""
+import os
+import random
+import re
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.product_search import ProductSearchIndex  # noqa: E402
+
+PRODUCTS = 50_000
+CATEGORIES = ("plant", "seed", "skincare", "accessory", "medicine")
+QUERIES = ["tulsi", "tul", "neem oil", "ash", "aloe vera gel", "seed", "organic", "zzq", "rose", "skin glow"]
+REPEATS = 20
+LIMIT = 10
+
+
+def synthetic_products(n, rng):
+    common = ["tulsi", "neem", "aloe", "vera", "rose", "ashwagandha", "amla", "brahmi", "organic", "herbal",
+              "oil", "gel", "seed", "pot", "glow", "skin", "hair", "tablet", "powder", "mint"]
+    vocab = common + ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(5000)]
+
+    def words(k):
+        # Zipf-ish: a few common words, a long tail of rare ones
+        return " ".join(vocab[min(int(rng.paretovariate(1.1)) - 1, len(vocab) - 1)] if rng.random() < 0.5
+                        else rng.choice(vocab) for _ in range(k))
+
+    return [
+        {
+            "_id": f"p{i}",
+            "name": words(rng.randint(2, 4)).title(),
+            "category": rng.choice(CATEGORIES),
+            "image": f"https://example.com/{i}.jpg",
+            "ingredients": [words(1) for _ in range(rng.randint(0, 4))],
+            "benefits": [words(2) for _ in range(rng.randint(0, 3))],
+        }
+        for i in range(n)
+    ]
+
+
+def regex_search(products, query):
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    matches = [p for p in products if pattern.search(p["name"])]
+    return matches[:LIMIT]
+
+
+def percentiles(fn):
+    timings = []
+    for _ in range(REPEATS):
+        for query in QUERIES:
+            started = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    rng = random.Random(11)
+    products = synthetic_products(PRODUCTS, rng)
+
+    started = time.perf_counter()
+    index = ProductSearchIndex(products)
+    build_s = time.perf_counter() - started
+    print(f"{PRODUCTS:,} products, {len(index.vocab):,} terms, index built in {build_s:.2f}s\n")
+
+    print(f"{'approach':<36} | {'p50 ms':>8} | {'p95 ms':>8}")
+    for label, fn in (("regex scan over names, slice 10", lambda q: regex_search(products, q)),
+                      ("inverted index, ranked top 10", lambda q: index.search(q, limit=LIMIT))):
+        p50, p95 = percentiles(fn)
+        print(f"{label:<36} | {p50:>8.3f} | {p95:>8.3f}")
+
+    print("\nSample results (index):")
+    for query in QUERIES[:4]:
+        print(f"  {query!r:<12} -> {[p['name'] for p in index.search(query, limit=3)]}")
+
+
+if __name__ == "__main__":
+    main()
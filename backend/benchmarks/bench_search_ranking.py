@@ -0,0 +1,96 @@
+"""Micro-benchmark: legacy per-plant ranking loop vs vectorized hybrid scoring.
+
+Run from the backend directory:
+    python benchmarks/bench_search_ranking.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.keyword_index import KeywordIndex  # noqa: E402
+from services.search_ranking import normalize_rows, semantic_scores, hybrid_scores, top_k_indices  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+DIM = 384
+TOP_K = 5
+BOOST_WEIGHT = 0.4
+REPEATS = 5
+VOCAB = [
+    "cough", "cold", "fever", "stress", "immunity", "digestion", "diabetes", "skin", "hair", "fall",
+    "antioxidant", "antibacterial", "antiviral", "adaptogenic", "anti", "inflammatory", "asthma",
+    "arthritis", "liver", "kidney", "wound", "healing", "memory", "sleep", "acidity", "constipation",
+] + [f"term{i}" for i in range(2000)]
+QUERY_TOKENS = {"cough", "fever", "immunity"}
+
+
+def synthetic_plants(n, rng):
+    return [
+        {
+            "common_name": f"Plant {i}",
+            "medicinal_properties": [" ".join(rng.sample(VOCAB, 2)) for _ in range(3)],
+            "medicinal_uses": rng.sample(VOCAB, 5),
+        }
+        for i in range(n)
+    ]
+
+
+def legacy_keyword_boost_score(query_tokens, plant):
+    fields = []
+    fields.extend(plant.get("medicinal_properties", []))
+    fields.extend(plant.get("medicinal_uses", []))
+    plant_tokens = set(re.findall(r"\b\w+\b", " ".join(fields).lower()))
+    return len(query_tokens.intersection(plant_tokens)) / max(len(query_tokens), 1)
+
+
+def legacy_rank(query_vec, embeddings, plants):
+    norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_vec)
+    scores = (embeddings @ query_vec) / np.where(norms == 0, 1, norms)
+    results = []
+    for i, plant in enumerate(plants):
+        base = float(scores[i])
+        boost = legacy_keyword_boost_score(QUERY_TOKENS, plant)
+        results.append((base + BOOST_WEIGHT * boost, i))
+    results.sort(key=lambda x: x[0], reverse=True)
+    return [i for _, i in results[:TOP_K]]
+
+
+def vectorized_rank(query_vec, normalized, index):
+    scores = semantic_scores(query_vec, normalized)
+    positions, values = index.boost_scores(QUERY_TOKENS)
+    scores = hybrid_scores(scores, positions, values, BOOST_WEIGHT)
+    return top_k_indices(scores, TOP_K).tolist()
+
+
+def best_of(fn, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    rng = random.Random(42)
+    np_rng = np.random.default_rng(42)
+    print(f"{'plants':>8} | {'legacy ms':>10} | {'vectorized ms':>13} | {'speedup':>7} | same top-k")
+    for n in SIZES:
+        plants = synthetic_plants(n, rng)
+        embeddings = np_rng.standard_normal((n, DIM), dtype=np.float32)
+        query_vec = np_rng.standard_normal(DIM, dtype=np.float32)
+        normalized = normalize_rows(embeddings)
+        index = KeywordIndex.from_plants(plants)
+
+        legacy_s, legacy_top = best_of(legacy_rank, query_vec, embeddings, plants)
+        fast_s, fast_top = best_of(vectorized_rank, query_vec, normalized, index)
+        print(f"{n:>8} | {legacy_s * 1000:>10.2f} | {fast_s * 1000:>13.3f} | {legacy_s / fast_s:>6.0f}x | {legacy_top == fast_top}")
+
+
+if __name__ == "__main__":
+    main()
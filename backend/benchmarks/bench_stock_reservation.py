@@ -0,0 +1,173 @@
+"""Concurrent checkouts: find_one + update_one per line (previous place_order) vs one
+conditional bulk_write per collection (stock_reservation).
+
+Many checkouts race for a few scarce products. A correct engine sells exactly the
+available stock and never drives it negative. Runs against mongomock, made to behave
+like a server: each operation is atomic (a per-collection lock) and costs a simulated
+round-trip (MONGO_RTT_MS, default 0.5 ms) outside that lock. Set BENCH_MONGO_URI to run
+against a real mongod instead (uses a scratch database). Run from the backend directory:
+    python benchmarks/bench_stock_reservation.py
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.stock_reservation import ReservationFailed, reserve_stock  # noqa: E402
+
+CHECKOUTS = 400
+WORKERS = 32
+STOCK = 50                 # per scarce product
+SCARCE_PRODUCTS = 4
+LINES_PER_ORDER = (3, 8)
+RTT_MS = float(os.getenv("MONGO_RTT_MS", "0.5"))
+CATEGORIES = {"plant": "plants", "seed": "seeds", "medicine": "medicines"}
+
+
+class ServerLikeCollection:
+    """mongomock collection with per-operation atomicity and a simulated round-trip."""
+
+    round_trips = 0
+
+    def __init__(self, collection, rtt):
+        self._collection = collection
+        self._lock = threading.Lock()
+        self._rtt = rtt
+        self.name = collection.name
+
+    def _round_trip(self):
+        ServerLikeCollection.round_trips += 1  # approximate under threads; fine for a tally
+        time.sleep(self._rtt)
+
+    def bulk_write(self, requests, ordered=True):
+        # mongomock's bulk_write does not accept current pymongo UpdateOne objects; apply
+        # the updates one by one, each atomic on its own like a server does per document
+        self._round_trip()
+        matched = 0
+        for op in requests:
+            with self._lock:
+                matched += self._collection.update_one(op._filter, op._doc).matched_count
+        return SimpleNamespace(matched_count=matched)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        def call(*args, **kwargs):
+            self._round_trip()
+            with self._lock:
+                result = method(*args, **kwargs)
+                return list(result) if name == "find" else result
+        return call
+
+
+def database():
+    uri = os.getenv("BENCH_MONGO_URI")
+    if uri:
+        from pymongo import MongoClient
+        client = MongoClient(uri, maxPoolSize=WORKERS * 2)
+        client.drop_database("bench_stock_reservation")
+        db = client["bench_stock_reservation"]
+        return {category: db[name] for category, name in CATEGORIES.items()}
+    import mongomock
+    db = mongomock.MongoClient()["bench_stock_reservation"]
+    return {category: ServerLikeCollection(db[name], RTT_MS / 1000) for category, name in CATEGORIES.items()}
+
+
+def seed(collections):
+    for category, collection in collections.items():
+        collection.delete_many({})
+        collection.insert_many(
+            [{"_id": f"{category}-scarce-{i}", "name": f"Scarce {category} {i}", "stock": STOCK} for i in range(SCARCE_PRODUCTS)]
+            + [{"_id": f"{category}-{i}", "name": f"{category.title()} {i}", "stock": 1_000_000} for i in range(20)]
+        )
+
+
+def orders(rng):
+    result = []
+    for _ in range(CHECKOUTS):
+        lines = []
+        for _ in range(rng.randint(*LINES_PER_ORDER)):
+            category = rng.choice(list(CATEGORIES))
+            product_id = (f"{category}-scarce-{rng.randrange(SCARCE_PRODUCTS)}" if rng.random() < 0.3
+                          else f"{category}-{rng.randrange(20)}")
+            lines.append({"product_id": product_id, "category": category, "quantity": rng.randint(1, 2), "name": product_id})
+        result.append(lines)
+    return result
+
+
+def legacy_checkout(lines, collections):
+    # What place_order used to do: check, then decrement, one line at a time
+    for item in lines:
+        collection = collections[item["category"]]
+        product = collection.find_one({"_id": item["product_id"]})
+        if not product or product.get("stock", 0) < item["quantity"]:
+            return False
+        collection.update_one({"_id": item["product_id"]}, {"$inc": {"stock": -item["quantity"]}})
+    return True
+
+
+def reservation_checkout(lines, collections):
+    try:
+        reserve_stock(lines, collections.get)
+        return True
+    except ReservationFailed:
+        return False
+
+
+def run(label, checkout, collections, all_orders):
+    seed(collections)
+    latencies, outcomes = [], []
+
+    def place(lines):
+        started = time.perf_counter()
+        ok = checkout(lines, collections)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return ok, lines
+
+    ServerLikeCollection.round_trips = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        outcomes = list(pool.map(place, all_orders))
+    wall = time.perf_counter() - started
+    round_trips = ServerLikeCollection.round_trips
+
+    # Units the successful orders account for vs units that actually left the shelf
+    sold = {}
+    for ok, lines in outcomes:
+        for item in lines if ok else []:
+            sold[item["product_id"]] = sold.get(item["product_id"], 0) + item["quantity"]
+    negative, unaccounted = 0, 0
+    for category, collection in collections.items():
+        for i in range(SCARCE_PRODUCTS):
+            product_id = f"{category}-scarce-{i}"
+            stock = collection.find_one({"_id": product_id})["stock"]
+            negative += stock < 0
+            unaccounted += (STOCK - stock) - sold.get(product_id, 0)
+    oversold = sum(max(0, units - STOCK) for product_id, units in sold.items() if "scarce" in product_id)
+    latencies.sort()
+    print(f"{label:<26} | {sum(ok for ok, _ in outcomes):>6} | {oversold:>8} | {negative:>8} | {unaccounted:>11} | "
+          f"{round_trips / len(all_orders):>7.1f} | {statistics.median(latencies):>7.2f} | "
+          f"{latencies[int(len(latencies) * 0.95)]:>7.2f} | {wall:>6.2f}")
+
+
+def main():
+    collections = database()
+    all_orders = orders(random.Random(5))
+    print(f"{CHECKOUTS} checkouts, {WORKERS} in parallel, {SCARCE_PRODUCTS * len(CATEGORIES)} scarce products x {STOCK} units\n")
+    print(f"{'approach':<26} | {'orders':>6} | {'oversold':>8} | {'negative':>8} | {'unaccounted':>11} | "
+          f"{'rt/order':>7} | {'p50 ms':>7} | {'p95 ms':>7} | {'wall s':>6}")
+    run("find_one + update_one", legacy_checkout, collections, all_orders)
+    run("conditional bulk_write", reservation_checkout, collections, all_orders)
+    if not os.getenv("BENCH_MONGO_URI"):
+        print("\nmongomock runs its queries in this process, so the ms columns include its CPU time under the")
+        print("GIL; rt/order (round-trips per order) is what scales latency against a real server.")
+
+
+if __name__ == "__main__":
+    main()
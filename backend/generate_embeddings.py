@@ -1,17 +1,33 @@
-import requests
 import numpy as np
-import pickle # Used to save data structure
+import pickle # Used to read the legacy cache for --from-pickle
+import argparse
+import hashlib
 import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from services.http_client import http_client
+from services.embedding_service import EMBEDDING_BACKEND, EMBEDDING_DIM, MODEL_NAME, create_backend
+from services.search_store import STORE_DIR, current_version, open_store, write_store
 
 # --- Configuration (Must match plant_model.py) ---
 API_URL = "https://plant-api-buj0.onrender.com/api/plants"
 API_KEY = "mysecretkey123"
-HF_API = "https://api-inference.huggingface.co/models/sentence-transformers/paraphrase-MiniLM-L3-v2"
+
+# Batching / concurrency defaults (override on the command line)
+BATCH_SIZE = 32          # texts per embedding request / forward pass
+REMOTE_CONCURRENCY = 4   # in-flight Hugging Face requests
+MAX_RETRIES = 4          # per batch, with exponential backoff
+BACKOFF_BASE = 2.0       # seconds
+
+# Finished batches are appended here so an interrupted run can resume
+CHECKPOINT_PATH = os.path.join(STORE_DIR, ".embedding_checkpoint.bin")
 
 # --- Helper Functions (Copied from plant_model.py) ---
 def fetch_plant_data():
     headers = {"x-api-key": API_KEY}
-    response = requests.get(API_URL, headers=headers)
+    response = http_client.get(API_URL, headers=headers, timeout=60, retries=3)
     response.raise_for_status()
     return response.json()
 
@@ -27,42 +43,197 @@ def merge_plant_text(plant):
         if v: text_parts.append(f"{k}: {v}")
     return ". ".join(text_parts)
 
-def get_remote_embedding(text):
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# --- Checkpoint (header naming the model, then append-only: 40-byte text hash + float32 vector per record) ---
+CHECKPOINT_HEADER_SIZE = 256
+
+class EmbeddingCheckpoint:
+    def __init__(self, path, model=MODEL_NAME, dim=EMBEDDING_DIM):
+        self.path = path
+        self.header = f"{model}\n{dim}\n".encode("utf-8").ljust(CHECKPOINT_HEADER_SIZE, b"\0")
+        self.dtype = np.dtype([("key", "S40"), ("vector", "<f4", (dim,))])
+        self.vectors = {}
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                header = f.read(CHECKPOINT_HEADER_SIZE)
+            if header != self.header:
+                # Left by a run with another model: its vectors must not be mixed in
+                previous_model = header.split(b"\n")[0].decode("utf-8", "replace")
+                print(f"⚠️ Discarding checkpoint written for another model ({previous_model!r}).")
+                os.remove(path)
+                return
+            size = os.path.getsize(path) - CHECKPOINT_HEADER_SIZE
+            usable = size - size % self.dtype.itemsize  # drop a record torn by a crash
+            records = np.fromfile(path, dtype=self.dtype, count=usable // self.dtype.itemsize,
+                                  offset=CHECKPOINT_HEADER_SIZE)
+            self.vectors = {r["key"].decode(): r["vector"].copy() for r in records}
+
+    def add(self, keys, vectors):
+        records = np.empty(len(keys), dtype=self.dtype)
+        records["key"] = [k.encode() for k in keys]
+        records["vector"] = vectors
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(self.header)
+            records.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self.vectors.update(zip(keys, records["vector"]))
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# --- Batched embedding with retries ---
+def embed_with_retries(backend, texts, retries, backoff_base):
+    for attempt in range(retries + 1):
+        try:
+            return backend.embed_batch(texts)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff_base * (2 ** attempt) * (0.5 + random.random())
+            print(f"⚠️ Batch of {len(texts)} failed ({e}); retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def load_previous_vectors():
+    """Maps content hash -> embedding for every row of the currently published store."""
+    if current_version(STORE_DIR) is None:
+        return {}
     try:
-        r = requests.post(HF_API, json={"inputs": text}, timeout=30) # Increased timeout
-        data = r.json()
-        if isinstance(data, list):
-            return np.array(data[0], dtype=np.float32)
+        store = open_store(STORE_DIR)
+        hashes = store.content_hashes()
     except Exception as e:
-        print(f"⚠️ Embedding error for text: '{text[:50]}...':", e)
-    return np.zeros(384, dtype=np.float32)
+        print(f"⚠️ Could not read previous search store ({e}); embedding everything.")
+        return {}
+    if hashes is None:
+        print("⚠️ Previous search store has no content hashes; embedding everything.")
+        return {}
+    model, dim = store.manifest.get("model"), store.manifest.get("dim")
+    if model != MODEL_NAME or dim != EMBEDDING_DIM:
+        # Vectors from another model live in another space (and may not even have the same size)
+        print(f"⚠️ Previous search store was built with {model} ({dim}d), not {MODEL_NAME} ({EMBEDDING_DIM}d); embedding everything.")
+        return {}
+    return {h: np.array(store.embeddings[i]) for i, h in enumerate(hashes)}
+
+def embed_texts(texts, backend, checkpoint, batch_size, concurrency, retries, backoff_base, known=None):
+    """Embeds texts not already in ``known`` or the checkpoint. Returns the set of text hashes that failed."""
+    known = known or {}
+    keys = [text_hash(t) for t in texts]
+    todo = {}
+    for key, text in zip(keys, texts):
+        if key not in known and key not in checkpoint.vectors:
+            todo.setdefault(key, text)  # identical texts are embedded once
+    reused = sum(1 for k in keys if k in known)
+    print(f"   {reused} unchanged (reused), {len(texts) - reused - len(todo)} restored from checkpoint, {len(todo)} to embed.")
+
+    pending = list(todo.items())
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    failed = set()
+    done = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(embed_with_retries, backend, [t for _, t in batch], retries, backoff_base): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            batch_keys = [k for k, _ in batch]
+            try:
+                checkpoint.add(batch_keys, future.result())
+            except Exception as e:
+                print(f"❌ Batch of {len(batch)} failed after {retries} retries: {e}")
+                failed.update(batch_keys)
+            done += len(batch)
+            print(f"   {done}/{len(pending)} embedded", end="\r")
+    print()
+    return failed
 
 # --- Main Logic ---
-def generate_and_save_embeddings():
+def generate_and_save_embeddings(args):
     print("Step 1: Fetching all plant data...")
     plants_data = fetch_plant_data()
     print(f"✅ Fetched {len(plants_data)} plants.")
-    
+
     # Merge text for embedding generation
     texts = [merge_plant_text(p) for p in plants_data]
 
-    print("Step 2: Generating remote embeddings (This might take a while)...")
-    embeddings = [get_remote_embedding(t) for t in texts]
-    
-    # Combine the data for saving
-    combined_data = {
-        "plants_data": plants_data,
-        "embeddings": np.stack(embeddings).astype(np.float32) # Ensure correct dtype
-    }
-    
-    # Save the combined data using pickle (more efficient for complex objects)
-    SAVE_PATH = os.path.join(os.path.dirname(__file__), "cached_search_data.pkl")
-    with open(SAVE_PATH, "wb") as f:
-        pickle.dump(combined_data, f)
-        
-    print(f"\n✨ SUCCESS! Data saved to: {SAVE_PATH}")
-    print(f"Total plants saved: {len(combined_data['plants_data'])}")
-    print(f"Embeddings shape: {combined_data['embeddings'].shape}")
+    # The backend asked for is the one used: a silent switch would change the embedding model
+    try:
+        backend = create_backend(args.backend, fallback=False)
+    except Exception as e:
+        print(f"❌ {e}. Pass --backend remote to use the inference API instead.")
+        sys.exit(1)
+    concurrency = args.concurrency or (REMOTE_CONCURRENCY if backend.name == "remote" else 1)
+    print(f"Step 2: Generating embeddings ({backend.name} backend, batch={args.batch_size}, concurrency={concurrency})...")
+    started = time.perf_counter()
+    # Only new or changed plants (by hash of their merged text) are sent to the model
+    previous = {} if args.full else load_previous_vectors()
+    current_hashes = {text_hash(t) for t in texts}
+    if previous:
+        print(f"   Previous store: {len(previous)} embeddings, {len(previous.keys() - current_hashes)} no longer used (dropped).")
+    checkpoint = EmbeddingCheckpoint(CHECKPOINT_PATH)
+    failed = embed_texts(texts, backend, checkpoint, args.batch_size, concurrency, args.retries, BACKOFF_BASE,
+                         known=previous)
+    print(f"✅ Embedding finished in {time.perf_counter() - started:.1f}s")
+
+    keep = [i for i, t in enumerate(texts) if text_hash(t) not in failed]
+    if failed:
+        print(f"❌ {len(plants_data) - len(keep)} plants could not be embedded:")
+        for i, t in enumerate(texts):
+            if text_hash(t) in failed:
+                print(f"   - {plants_data[i].get('common_name') or plants_data[i].get('slug') or i}")
+        if not args.allow_partial:
+            print("Search store NOT written. Re-run to retry the failed plants (finished ones are checkpointed),")
+            print("or pass --allow-partial to publish without them.")
+            sys.exit(1)
+
+    if not keep:
+        print("❌ No plant could be embedded; search store NOT written.")
+        sys.exit(1)
+
+    vectors = {**previous, **checkpoint.vectors}
+    hashes = [text_hash(texts[i]) for i in keep]
+    embeddings = np.stack([vectors[h] for h in hashes]).astype(np.float32)
+    save_search_store([plants_data[i] for i in keep], embeddings, hashes)
+    checkpoint.remove()
+
+def save_search_store(plants_data, embeddings, content_hashes=None):
+    # Memory-mapped store read by plant_model.py (embeddings, plant records, keyword + ANN index)
+    version = write_store(plants_data, embeddings, STORE_DIR, model=MODEL_NAME, content_hashes=content_hashes)
+    print(f"\n✨ SUCCESS! Search store {version} saved to: {STORE_DIR}")
+    print(f"Total plants saved: {len(plants_data)}")
+    print(f"Embeddings shape: {embeddings.shape}")
+
+def migrate_pickle_cache():
+    """Converts the legacy cached_search_data.pkl into the search store without re-embedding."""
+    PICKLE_PATH = os.path.join(os.path.dirname(__file__), "cached_search_data.pkl")
+    with open(PICKLE_PATH, "rb") as f:
+        combined_data = pickle.load(f)
+    hashes = [text_hash(merge_plant_text(p)) for p in combined_data["plants_data"]]
+    save_search_store(combined_data["plants_data"], combined_data["embeddings"], hashes)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embed all plants and publish the search store.")
+    parser.add_argument("--backend", choices=["local", "remote"], default=EMBEDDING_BACKEND)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"parallel batches (default: {REMOTE_CONCURRENCY} remote, 1 local)")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--full", action="store_true",
+                        help="re-embed every plant instead of only new or changed ones")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="publish the store even if some plants failed to embed (they are left out)")
+    parser.add_argument("--from-pickle", action="store_true",
+                        help="convert cached_search_data.pkl into the search store and exit")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    generate_and_save_embeddings()
\ No newline at end of file
+    args = parse_args()
+    if args.from_pickle:
+        migrate_pickle_cache()
+    else:
+        generate_and_save_embeddings(args)
@@ -10,6 +10,7 @@ from .coupon_routes import coupon_bp
 from .plant_model import search_bp
 from .orders import orders_bp
 from .contact import contact_bp
+from .admin import admin_bp
 
 def register_routes(app):
     app.register_blueprint(user_routes)
@@ -24,3 +25,4 @@ def register_routes(app):
     app.register_blueprint(search_bp)
     app.register_blueprint(orders_bp, url_prefix='/api')
     app.register_blueprint(contact_bp, url_prefix="/api/contact")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
@@ -0,0 +1,85 @@
+from flask import Blueprint, jsonify, request
+from dotenv import load_dotenv
+import hmac
+import os
+
+from services.embedding_cache import query_embedding_cache
+from services.http_client import http_client
+from services.plant_catalogue import plant_catalogue
+from services.pdf_report import plant_reports
+from services.plant_documents import plant_documents
+from services.product_router import product_router
+from services.product_search import product_catalogue
+from services.search_service import disk_version, get_search_index, refresh_search_index
+
+load_dotenv()
+
+admin_bp = Blueprint("admin_bp", __name__)
+
+# Shared secret; admin endpoints require a matching X-Admin-Token header and are
+# disabled (404) while it is not set.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+@admin_bp.before_request
+def check_admin_token():
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Unauthorized"}), 401
+
+
+@admin_bp.route("/search-index", methods=["GET"])
+def search_index_status():
+    """Reports the search index version this worker is serving and when it was loaded."""
+    index = get_search_index()
+    return jsonify({
+        "pid": os.getpid(),
+        "serving": index.describe() if index else None,
+        "disk_version": disk_version(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+    }), 200
+
+
+@admin_bp.route("/search-index/reload", methods=["POST"])
+def reload_search_index():
+    """Loads the latest on-disk index into this worker now instead of waiting for the poller."""
+    swapped = refresh_search_index(force=request.args.get("force") == "1")
+    index = get_search_index()
+    return jsonify({"reloaded": swapped, "serving": index.describe() if index else None}), 200
+
+
+@admin_bp.route("/plant-catalogue", methods=["GET"])
+def plant_catalogue_status():
+    """Reports the age and size of this worker's shared plant catalogue."""
+    return jsonify(plant_catalogue.stats()), 200
+
+
+@admin_bp.route("/plant-documents", methods=["GET"])
+def plant_documents_status():
+    """Hit rate and size of this worker's single-plant document cache."""
+    return jsonify(plant_documents.stats()), 200
+
+
+@admin_bp.route("/http-clients", methods=["GET"])
+def http_client_status():
+    """Per-host outbound request counts, latency and connections opened by this worker."""
+    return jsonify(http_client.stats()), 200
+
+
+@admin_bp.route("/pdf-reports", methods=["GET"])
+def pdf_reports_status():
+    """Size and hit rate of the rendered PDF report cache."""
+    return jsonify(plant_reports.stats()), 200
+
+
+@admin_bp.route("/product-router", methods=["GET"])
+def product_router_status():
+    """Size and age of this worker's product id -> collection map, and how often it had to probe."""
+    return jsonify(product_router.stats()), 200
+
+
+@admin_bp.route("/product-search", methods=["GET"])
+def product_search_status():
+    """Age and size of the product list behind this worker's product search index."""
+    return jsonify(product_catalogue.stats()), 200
@@ -11,6 +11,9 @@ from db import (
     accessories_collection,
     medicines_collection,
 )
+from services.cart_hydration import fetch_products, hydrate_cart, valid_cart_items
+from services.product_router import product_router
+from services.stock_reservation import ReservationFailed, release_stock, reserve_stock
 cart_bp = Blueprint('cart', __name__)
 
 orders_bp = Blueprint("orders_bp", __name__)
@@ -51,24 +54,6 @@ def place_order():
 
         order_timestamp = datetime.now(IST)
 
-        # Verify stock and reduce it properly
-        for item in purchased_products:
-            collection = get_collection_by_category(item.get("category"))
-            if not collection:
-                continue
-
-            product = collection.find_one({"_id": item["product_id"]})
-            if not product:
-                return jsonify({"error": f"Product not found for {item.get('name', 'unknown')}"}), 400
-
-            if product.get("stock", 0) < item.get("quantity", 0):
-                return jsonify({"error": f"Insufficient stock for {product.get('name', '')}"}), 400
-
-            collection.update_one(
-                {"_id": item["product_id"]},
-                {"$inc": {"stock": -item["quantity"]}}
-            )
-
         # Defensive copy and serialization: ensure all fields used are safe types for MongoDB/JSON
         sanitized_products = []
         for p in purchased_products:
@@ -92,11 +77,21 @@ def place_order():
             "placed_at": order_timestamp.isoformat()
         }
 
+        # Reserve stock for all lines at once (all or nothing, no overselling)
+        try:
+            reservation = reserve_stock(purchased_products, get_collection_by_category)
+        except (ReservationFailed, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
         # Push order into user's purchased array
-        users_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$push": {"purchased": order_record}}
-        )
+        try:
+            users_collection.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$push": {"purchased": order_record}}
+            )
+        except Exception:
+            release_stock(reservation)
+            raise
 
         # Clear user's purchased_collection document purchased_products
         purchased_collection.update_one(
@@ -129,6 +124,9 @@ def add_to_cart():
         if not user_id or not email or not product_id:
             return jsonify({"error": "User ID, Email, and Product ID are required"}), 400
 
+        if not isinstance(product_id, str):
+            return jsonify({"error": "Product ID must be a string"}), 400
+
         if not isinstance(quantity, int) or quantity < 1:
             return jsonify({"error": "Quantity must be a positive integer"}), 400
 
@@ -140,13 +138,8 @@ def add_to_cart():
         if not user:
             return jsonify({"error": "User not found or email mismatch"}), 404
 
-        product = None
-        for collection in [plants_collection, seeds_collection, skincare_collection, accessories_collection, medicines_collection]:
-            if collection is None:
-                continue
-            product = collection.find_one({"_id": product_id})
-            if product:
-                break
+        # One query against the collection that holds the product
+        product, _ = product_router.find_product(product_id)
 
         if not product:
             return jsonify({"error": f"Product not found: {product_id}"}), 404
@@ -195,28 +188,11 @@ def get_cart(user_id):
         if not user:
             return jsonify({"error": "User not found"}), 404
         if "cart" not in user or not user['cart']:
-            return jsonify({"cart": []}), 200
+            return jsonify({"cart": [], "missing": []}), 200
 
-        cart_items = []
-        for item in user['cart']:
-            if not isinstance(item, dict) or 'product_id' not in item or 'category' not in item:
-                continue
-            collection = get_collection_by_category(item['category'])
-            if collection is None:
-                continue
-            product = collection.find_one({"_id": item['product_id']})
-            if not product:
-                continue
-            cart_items.append({
-                "_id": str(product['_id']),
-                "name": product.get('name', 'Unknown'),
-                "price": product.get('price', 0),
-                "image": product.get('image', ''),
-                "category": product.get('category', ''),
-                "stock": product.get('stock', 0),
-                "quantity": item.get('quantity', 0)
-            })
-        return jsonify({"cart": cart_items}), 200
+        # One $in query per category instead of one find_one per cart item
+        cart_items, missing = hydrate_cart(user['cart'], get_collection_by_category)
+        return jsonify({"cart": cart_items, "missing": missing}), 200
     except Exception as e:
         return jsonify({"error": f"Failed to fetch cart: {str(e)}"}), 500
 
@@ -232,6 +208,9 @@ def update_cart_item():
         if not user_id or not email or not product_id or quantity is None:
             return jsonify({"error": "User ID, Email, Product ID, and quantity are required"}), 400
 
+        if not isinstance(product_id, str):
+            return jsonify({"error": "Product ID must be a string"}), 400
+
         if not isinstance(quantity, int) or quantity < 1:
             return jsonify({"error": "Quantity must be a positive integer"}), 400
 
@@ -243,13 +222,8 @@ def update_cart_item():
         if not user:
             return jsonify({"error": "User not found or email mismatch"}), 404
 
-        product = None
-        for collection in [plants_collection, seeds_collection, skincare_collection, accessories_collection, medicines_collection]:
-            if collection is None:
-                continue
-            product = collection.find_one({"_id": product_id})
-            if product:
-                break
+        # One query against the collection that holds the product
+        product, _ = product_router.find_product(product_id)
 
         if not product:
             return jsonify({"error": f"Product not found: {product_id}"}), 404
@@ -279,6 +253,9 @@ def remove_cart_item():
         if not user_id or not email or not product_id:
             return jsonify({"error": "User ID, Email, and Product ID are required"}), 400
 
+        if not isinstance(product_id, str):
+            return jsonify({"error": "Product ID must be a string"}), 400
+
         try:
             user = users_collection.find_one({"_id": ObjectId(user_id), "email": email})
         except Exception as e:
@@ -334,15 +311,11 @@ def checkout():
 
         purchased_products = purchased_doc.get("purchased_products", [])
 
-        for item in user_cart['cart']:
-            if not isinstance(item, dict) or 'product_id' not in item or 'category' not in item:
-                continue
-
-            collection = get_collection_by_category(item['category'])
-            if collection is None:
-                continue
+        cart = valid_cart_items(user_cart['cart'])
+        products = fetch_products(cart, get_collection_by_category)
 
-            product = collection.find_one({"_id": item['product_id']})
+        for item in cart:
+            product = products.get((item['category'], item['product_id']))
             if not product:
                 continue
 
@@ -413,6 +386,9 @@ def update_order_item():
         if not user_id or not email or not product_id or quantity is None:
             return jsonify({"error": "User ID, Email, Product ID, and quantity are required"}), 400
 
+        if not isinstance(product_id, str):
+            return jsonify({"error": "Product ID must be a string"}), 400
+
         if not isinstance(quantity, int) or quantity < 1:
             return jsonify({"error": "Quantity must be a positive integer"}), 400
 
@@ -1,9 +1,6 @@
-from flask import Blueprint, jsonify, send_file, request
-import folium
-import geopandas as gpd
-import pandas as pd
-import os
-import requests
+from flask import Blueprint, jsonify, request, Response, redirect, url_for
+from services.plant_documents import plant_documents
+from services.state_map import get_state_geometry, heatmap_values, heatmaps
 
 map_bp = Blueprint("map_bp", __name__)
 
@@ -14,74 +11,79 @@ def state_heatmap():
     if not plant_name:
         return jsonify({"error": "Plant name required"}), 400
 
-    # Fetch plant data from the internal API
-    internal_api_url = "http://localhost:5000/api/search-plant"
+    # Plant data comes from the shared per-plant cache (no HTTP call back into this server)
     try:
-        response = requests.get(internal_api_url, params={"name": plant_name}, headers={"x-api-key": "mysecretkey123"})
-        if response.status_code != 200:
-            return jsonify({"error": f"Failed to fetch plant data: {response.json().get('error', 'Unknown error')}"}), 500
-        plant_data = response.json()
-
-        # Extract where_grown_in_india from API response
-        where_grown = plant_data.get("where_grown_in_india", {})
-        if not where_grown:
-            return jsonify({"error": "No distribution data available for this plant"}), 400
-
-    except requests.RequestException as e:
+        document = plant_documents.get(plant_name)
+    except Exception as e:
         return jsonify({"error": f"API request failed: {str(e)}"}), 500
-    except ValueError:
+    if not document:
+        return jsonify({"error": "Failed to fetch plant data: Plant not found"}), 404
+
+    # Extract where_grown_in_india from the plant document
+    where_grown = document.plant.get("where_grown_in_india", {})
+    if not where_grown:
+        return jsonify({"error": "No distribution data available for this plant"}), 400
+    if not isinstance(where_grown, dict):
         return jsonify({"error": "Invalid API response format"}), 500
 
-    # Convert to DataFrame for merging
-    df = pd.DataFrame(list(where_grown.items()), columns=["NAME_1", "Value"])
+    # Data-only mode: the client draws {state: value} on the separately cached geometry
+    if request.args.get("format") == "json":
+        try:
+            version = get_state_geometry().version
+        except Exception as e:
+            return jsonify({"error": f"Failed to read GeoJSON file: {str(e)}"}), 500
+        response = jsonify({
+            "plant": document.plant.get("common_name") or plant_name,
+            "values": heatmap_values(where_grown),
+            "geometry_version": version,
+            "geometry_url": url_for("map_bp.state_geometry", version=version),
+        })
+        response.set_etag(f"{document.etag}:{version}")
+        response.headers["Cache-Control"] = "public, max-age=600"
+        return response.make_conditional(request)
 
-    # Load GeoJSON file
-    geojson_path = os.path.join(os.path.dirname(__file__), "..", "india.geojson")
-    if not os.path.exists(geojson_path):
-        return jsonify({"error": f"GeoJSON file not found at {geojson_path}"}), 500
+    # Rendered once per plant version against geometry loaded and simplified once per process
     try:
-        gdf = gpd.read_file(geojson_path)
-        # Merge GeoJSON data with API-derived data
-        merged = gdf.merge(df, on="NAME_1", how="left")
-        # Fill NaN values with 0 for states not in the data
-        merged["Value"] = merged["Value"].fillna(0)
+        html, etag = heatmaps.get(document.plant.get("common_name") or plant_name, where_grown, document.etag)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 500
     except Exception as e:
         return jsonify({"error": f"Failed to read GeoJSON file: {str(e)}"}), 500
 
-    # Create Folium map centered on India
-    m = folium.Map(location=[20.5937, 78.9629], zoom_start=5, tiles="OpenStreetMap")
+    # Serve the HTML straight from memory
+    response = Response(html, mimetype="text/html")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "public, max-age=600"
+    return response.make_conditional(request)
 
-    # Add choropleth layer
-    choropleth = folium.Choropleth(
-        geo_data=merged,
-        name=f"{plant_name} Growth Index",
-        data=merged,
-        columns=["NAME_1", "Value"],
-        key_on="feature.properties.NAME_1",
-        fill_color="YlGnBu",
-        fill_opacity=0.8,
-        line_opacity=0.3,
-        legend_name=f"{plant_name} Growth Index",
-        nan_fill_color="gray",
-        nan_fill_opacity=0.4
-    ).add_to(m)
 
-    # Add tooltips
-    folium.GeoJsonTooltip(
-        fields=["NAME_1", "Value"],
-        aliases=["State:", "Growth Index:"],
-        localize=True,
-        sticky=True,
-        labels=True,
-        style="background-color: #F0EFEF; border: 2px solid black; border-radius: 3px; box-shadow: 3px;"
-    ).add_to(choropleth.geojson)
+@map_bp.route("/state-geometry")
+def current_state_geometry():
+    """Redirects to the versioned geometry file currently in use."""
+    try:
+        version = get_state_geometry().version
+    except Exception as e:
+        return jsonify({"error": f"Failed to read GeoJSON file: {str(e)}"}), 500
+    return redirect(url_for("map_bp.state_geometry", version=version))
 
-    # Add layer control
-    folium.LayerControl().add_to(m)
 
-    # Save map to a temporary HTML file
-    map_path = os.path.join(os.path.dirname(__file__), "temp_map.html")
-    m.save(map_path)
+@map_bp.route("/state-geometry/<version>.geojson")
+def state_geometry(version):
+    """Simplified, quantized state boundaries. Immutable per version, so clients cache it for a year."""
+    try:
+        geometry = get_state_geometry()
+    except Exception as e:
+        return jsonify({"error": f"Failed to read GeoJSON file: {str(e)}"}), 500
+    if version != geometry.version:
+        return jsonify({"error": "Unknown geometry version", "current_version": geometry.version}), 404
 
-    # Serve the HTML file
-    return send_file(map_path, mimetype="text/html")
\ No newline at end of file
+    body, gzipped = geometry.geojson_bytes()
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = Response(gzipped, mimetype="application/geo+json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype="application/geo+json")
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.set_etag(version)
+    return response.make_conditional(request)
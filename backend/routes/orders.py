@@ -13,6 +13,7 @@ from db import (
     medicines_collection,
     client
 )
+from services.stock_reservation import ReservationFailed, release_stock, reserve_stock
 
 # ✅ Use the real collection name from shippinginfo.py
 shopping_info_collection = client["plantEcommerce"]["shopping_info"]
@@ -77,25 +78,7 @@ def place_order():
 
         purchased_products = purchased_doc["purchased_products"]
 
-        # 3️⃣ Reduce stock
-        for item in purchased_products:
-            collection = get_collection_by_category(item.get("category"))
-            if collection is None:
-                continue
-
-            prod = collection.find_one({"_id": item["product_id"]})
-            if prod is None:
-                return jsonify({"error": f"Product not found: {item.get('name', 'Unknown')}"}), 404
-
-            if int(prod.get("stock", 0)) < int(item.get("quantity", 0)):
-                return jsonify({"error": f"Insufficient stock for {prod['name']}"}), 400
-
-            collection.update_one(
-                {"_id": item["product_id"]},
-                {"$inc": {"stock": -int(item["quantity"])}}
-            )
-
-        # 4️⃣ Sanitize products for storage
+        # 3️⃣ Sanitize products for storage
         sanitized_products = []
         for p in purchased_products:
             sanitized_products.append({
@@ -108,7 +91,7 @@ def place_order():
                 "purchased_at": p.get("purchased_at").isoformat() if hasattr(p.get("purchased_at"), 'isoformat') else ""
             })
 
-        # 5️⃣ Create full order record
+        # 4️⃣ Create full order record
         order_record = {
             "order_id": str(ObjectId()),
             "products": sanitized_products,
@@ -119,11 +102,23 @@ def place_order():
             "placed_at": datetime.now(IST).isoformat()
         }
 
+        # 5️⃣ Reserve stock for all lines at once (all or nothing, no overselling)
+        try:
+            reservation = reserve_stock(purchased_products, get_collection_by_category)
+        except ReservationFailed as e:
+            return jsonify({"error": str(e)}), 404 if e.missing else 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         # 6️⃣ Save into user's permanent order history
-        users_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$push": {"purchased": order_record}}
-        )
+        try:
+            users_collection.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$push": {"purchased": order_record}}
+            )
+        except Exception:
+            release_stock(reservation)
+            raise
 
         # 7️⃣ Clear temp purchase & shopping info
         purchased_collection.update_one(
@@ -1,19 +1,10 @@
-from flask import Blueprint, request, jsonify, Response, make_response
-import requests
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
-from io import BytesIO
+from flask import Blueprint, request, jsonify, Response, make_response, stream_with_context
 import logging
-import urllib.request
-from urllib.request import urlopen
-import re
-import ssl
-from datetime import datetime
-from functools import lru_cache # For caching plant list in suggestions
+from urllib.parse import quote
+from services.plant_catalogue import plant_catalogue
+from services.plant_documents import PLANT_CACHE_TTL, plant_documents
+from services.pdf_report import COMBINED_PDF_MAX_PLANTS, plant_reports, report_key
+from services.autocomplete import AutocompleteIndex
 
 plant_bp = Blueprint("plant", __name__)
 
@@ -22,15 +13,14 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # --- CONFIGURATION (CORS FIX APPLIED HERE) ---
-API_URL = "https://plant-api-buj0.onrender.com/api/plant"
-API_KEY = "mysecretkey123" 
+# Clients may reuse a plant response this long before revalidating (seconds)
+DOCUMENT_MAX_AGE = int(PLANT_CACHE_TTL)
+# Plants per batch ZIP export (combined PDFs have their own, lower limit)
+BATCH_MAX_PLANTS = 100
 # --- FIX: ALLOWED ORIGINS ---
 ALLOWED_ORIGINS = ["http://localhost:5173", "https://ayurkosh.onrender.com"] 
-API_SUGGEST_URL = "https://plant-api-buj0.onrender.com/api/plants" 
 # ---------------------
 
-# Create an unverified SSL context to bypass certificate verification (temporary workaround)
-ssl_context = ssl._create_unverified_context()
 
 # ---------- CORS & Helper Functions (UPDATED) ----------
 
@@ -58,65 +48,31 @@ def handle_options_response(methods, headers="Content-Type, Content-Disposition,
     return response, 200
 
 
-@lru_cache(maxsize=1)
-def fetch_all_plants():
-    """Fetch all plants from the external API for suggestion lookup."""
-    try:
-        logger.debug("🔄 Fetching all plants for suggestions...")
-        headers = {"x-api-key": API_KEY}
-        response = requests.get(API_SUGGEST_URL, headers=headers, timeout=10) 
-        response.raise_for_status()
-        data = response.json()
-        logger.debug(f"✅ Fetched {len(data)} plants for suggestions.")
-        return data
-    except Exception as e:
-        logger.error(f"❌ Error fetching plants for suggestions: {e}", exc_info=True)
-        # Re-raise the exception to be caught by the endpoint wrapper for 500/502 handling
-        raise
+# Name autocomplete index, rebuilt alongside each catalogue refresh
+plant_catalogue.register_index("autocomplete", AutocompleteIndex)
 
-def fetch_plant_data(plant_name):
-    """Fetch single plant data from the remote API."""
-    try:
-        response = requests.get(
-            API_URL,
-            params={"name": plant_name},
-            headers={"x-api-key": API_KEY},
-            timeout=15 
-        )
-        response.raise_for_status() 
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 404:
-            return None
-        logger.error(f"HTTP Error fetching plant data: {e.response.status_code}")
-        raise
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Network/Request Error fetching plant data: {str(e)}", exc_info=True)
-        raise
-
-# ---------- Custom Canvas for Header and Footer (Unchanged) ----------
-def add_header_footer(canvas, doc):
-    """Add header and footer to each page."""
-    canvas.saveState()
-    
-    # Header
-    canvas.setFillColor(colors.darkgreen)
-    canvas.setFont("Helvetica-Bold", 12)
-    canvas.drawString(0.75*inch, doc.pagesize[1] - 0.5*inch, "Plant Information Report")
-    
-    # Footer
-    canvas.setFillColor(colors.grey)
-    canvas.setFont("Helvetica", 8)
-    footer_text = f"Generated on {datetime.now().strftime('%B %d, %Y')} | Page {doc.page}"
-    canvas.drawString(0.75*inch, 0.5*inch, footer_text)
-    
-    # Divider lines
-    canvas.setStrokeColor(colors.darkgreen)
-    canvas.setLineWidth(0.5)
-    canvas.line(0.75*inch, doc.pagesize[1] - 0.6*inch, doc.pagesize[0] - 0.75*inch, doc.pagesize[1] - 0.6*inch)
-    canvas.line(0.75*inch, 0.6*inch, doc.pagesize[0] - 0.75*inch, 0.6*inch)
-    
-    canvas.restoreState()
+def fetch_plant_document(plant_name):
+    """Single plant from the per-plant TTL cache (PlantDocument, or None if the API has no such plant)."""
+    return plant_documents.get(plant_name)
+
+def client_has_current(etag, last_modified):
+    """True if the client's cached copy (If-None-Match / If-Modified-Since) is still current."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+def set_validators(response, etag, last_modified):
+    """Adds ETag / Last-Modified / Cache-Control so clients and CDNs can revalidate with a 304."""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = f'public, max-age={DOCUMENT_MAX_AGE}'
+    return response
+
+def not_modified_response(etag, last_modified, methods="GET, OPTIONS", headers="Content-Type"):
+    response = set_validators(Response(status=304), etag, last_modified)
+    return set_cors_headers(response, methods=methods, headers=headers)
 
 # ---------- Endpoints (FIXED) ----------
 
@@ -132,21 +88,11 @@ def suggest_plants():
         return set_cors_headers(response), 200
 
     try:
-        # Use the cached plant list
-        all_plants = fetch_all_plants()
-        logger.debug(f"🔍 Searching prefix-matching suggestions for: '{query}'")
-
-        matches = [] 
-        for plant in all_plants:
-            common = plant.get("common_name", "").lower()
-            botanical = plant.get("botanical_name", "").lower()
-            if common.startswith(query) or botanical.startswith(query):
-                matches.append({
-                    "common_name": plant.get("common_name", ""),
-                    "botanical_name": plant.get("botanical_name", "")
-                })
-        
-        json_response = jsonify(matches[:10])
+        logger.debug(f"🔍 Searching suggestions for: '{query}'")
+
+        # Prefix lookup on the prebuilt autocomplete index, topped up with typo-tolerant matches
+        matches = plant_catalogue.index("autocomplete").suggest(query, limit=10)
+        json_response = jsonify(matches)
         return set_cors_headers(json_response), 200
         
     except Exception as e:
@@ -168,13 +114,14 @@ def search_plant():
         return set_cors_headers(response), 400
 
     try:
-        plant = fetch_plant_data(plant_name)
-        if plant:
-            json_response = jsonify(plant)
-            return set_cors_headers(json_response), 200
-        else:
+        document = fetch_plant_document(plant_name)
+        if not document:
             response = jsonify({"error": "Plant not found"})
             return set_cors_headers(response), 404
+        if client_has_current(document.etag, document.last_modified):
+            return not_modified_response(document.etag, document.last_modified)
+        json_response = set_validators(jsonify(document.plant), document.etag, document.last_modified)
+        return set_cors_headers(json_response), 200
     except Exception as e:
         # Robust error handling for 500
         logger.error(f"Exception in search_plant: {str(e)}", exc_info=True)
@@ -198,169 +145,89 @@ def generate_pdf():
         logger.debug(f"Generating PDF for plant: {name}")
 
         # Fetch plant data
-        plant = fetch_plant_data(name)
-        if not plant:
+        document = fetch_plant_document(name)
+        if not document:
             logger.error(f"Plant '{name}' not found in API")
             response = jsonify({"error": "Plant not found"})
             return set_cors_headers(response), 404
-        
+        plant = document.plant
+
+        # The report is a pure function of the plant document, so it shares its validators
+        pdf_etag = report_key(document.etag)
+        if client_has_current(pdf_etag, document.last_modified):
+            return not_modified_response(pdf_etag, document.last_modified, headers="Content-Type, Content-Disposition, X-Requested-With, Authorization")
+
         if not plant.get('common_name'):
             logger.error(f"Plant data missing common_name: {plant}")
             response = jsonify({"error": "Invalid plant data: missing common_name"})
             return set_cors_headers(response), 400
 
-        # Generate PDF with enhanced styling
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-             buffer,
-             pagesize=letter,
-             rightMargin=0.75*inch,
-             leftMargin=0.75*inch,
-             topMargin=1*inch,
-             bottomMargin=1*inch
-        )
-        styles = getSampleStyleSheet()
-
-        # Custom styles definition
-        title_style = ParagraphStyle(
-             name='TitleStyle', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=32, leading=36, alignment=1, spaceAfter=12, textColor=colors.HexColor('#2E7D32') 
-        )
-        subtitle_style = ParagraphStyle(
-             name='SubtitleStyle', parent=styles['Heading2'], fontName='Helvetica-Oblique', fontSize=16, leading=20, alignment=1, spaceAfter=16, textColor=colors.HexColor('#4B5EAA') 
-        )
-        section_style = ParagraphStyle(
-             name='SectionStyle', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=14, leading=18, spaceBefore=16, spaceAfter=10, textColor=colors.HexColor('#2E7D32'), backColor=colors.HexColor('#E8F5E9') 
-        )
-        item_style = ParagraphStyle(
-             name='ItemStyle', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=14, leftIndent=20, spaceAfter=8, textColor=colors.black, firstLineIndent=-10
-        )
-        caption_style = ParagraphStyle(
-             name='CaptionStyle', parent=styles['Normal'], fontName='Helvetica-Oblique', fontSize=9, leading=12, alignment=1, spaceAfter=12, textColor=colors.grey
-        )
-
-        elements = []
-
-        # Title and Subtitle
-        elements.append(Paragraph(plant.get('common_name', 'Unknown Plant'), title_style))
-        elements.append(Paragraph(plant.get('botanical_name', 'Not available'), subtitle_style))
-        elements.append(Spacer(1, 0.3*inch))
-
-        # Image fetching logic
-        images = plant.get('images', [])
-        image_added = False
-        if images and isinstance(images, list) and len(images) > 0:
-            for img_url in images:
-                if not img_url or not isinstance(img_url, str) or not re.match(r'.*\.(jpe?g|png|gif|webp|svg|bmp|ico|cms)$', img_url, re.IGNORECASE):
-                    logger.warning(f"Skipping invalid image URL: {img_url}")
-                    continue
-                try:
-                    logger.debug(f"Attempting to fetch image from: {img_url}")
-                    req = urllib.request.Request(img_url, headers={'User-Agent': 'Mozilla/5.0'})
-                    img_data = urlopen(req, context=ssl_context, timeout=10).read()
-                    img_bytes = BytesIO(img_data)
-                    img_reader = ImageReader(img_bytes)
-                    img_width = 3*inch
-                    aspect = img_reader.getSize()[1] / float(img_reader.getSize()[0])
-                    img_height = img_width * aspect
-                    if img_height > 3*inch:
-                        img_height = 3*inch
-                        img_width = img_height / aspect
-                    image = Image(img_bytes, width=img_width, height=img_height)
-                    image.hAlign = 'CENTER'
-                    elements.append(image)
-                    elements.append(Paragraph("Plant Image", caption_style))
-                    image_added = True
-                    break
-                except Exception as e:
-                    logger.warning(f"Failed to include image {img_url}: {str(e)}")
-        if not image_added:
-            elements.append(Paragraph("No image available", caption_style))
-        elements.append(Spacer(1, 0.3*inch))
-
-        # Family
-        elements.append(Paragraph(f"<b>Family:</b> {plant.get('family', 'Not available')}", item_style))
-        elements.append(Spacer(1, 0.4*inch))
-
-        # Ratings Table
-        ratings_data = [["Rating", "Value"]]
-        ratings = [
-             ('Eligibility Rating', plant.get('eligibility_rating')),
-             ('Medical Rating', plant.get('medical_rating')),
-             ('Other Uses Rating', plant.get('other_uses_rating'))
-        ]
-        for label, value in ratings:
-            if value is not None:
-                try:
-                    value = int(value) if isinstance(value, (int, float)) else 0
-                    value = max(0, min(5, value))
-                    stars = '★' * value + '☆' * (5 - value)
-                    ratings_data.append([label, stars])
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid rating value for {label}: {value}")
-                    ratings_data.append([label, "N/A"])
-        if len(ratings_data) > 1:
-            ratings_table = Table(ratings_data, colWidths=[3.5*inch, 2*inch])
-            ratings_table.setStyle(TableStyle([
-                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E7D32')), ('TEXTCOLOR', (0, 0), (-1, 0), colors.white), ('ALIGN', (0, 0), (-1, -1), 'CENTER'), ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('FONTSIZE', (0, 0), (-1, 0), 12), ('BOTTOMPADDING', (0, 0), (-1, 0), 10), ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F1F8E9')), ('TEXTCOLOR', (0, 1), (-1, -1), colors.black), ('FONTSIZE', (0, 1), (-1, -1), 10), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey), ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2E7D32')), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'), ('TOPPADDING', (0, 1), (-1, -1), 8), ('BOTTOMPADDING', (0, 1), (-1, -1), 8), ('LEFTPADDING', (0, 0), (-1, -1), 10), ('RIGHTPADDING', (0, 0), (-1, -1), 10)
-            ]))
-            elements.append(ratings_table)
-        elements.append(Spacer(1, 0.4*inch))
-
-        # Sections
-        for section_name, items in {
-            "Summary": [
-                ("Overview", plant.get('summary', 'No summary available')), ("Genus", plant.get('genus')),
-                ("Flowering Season", plant.get('flowering_season')), ("Fruiting Season", plant.get('fruiting_season')),
-                ("Conservation Status", plant.get('conservation_status')), ("Featured", "Yes" if plant.get('featured') else "No")
-            ],
-            "Cultivation": [
-                ("Sun Exposure", plant.get('sun_exposure')), ("Soil Type", plant.get('soil_type')),
-                ("Water Needs", plant.get('water_needs')), ("Temperature Range", plant.get('temperature_range')),
-                ("Harvesting Time", plant.get('harvesting_time')), ("Propagation Methods", plant.get('propagation_methods')),
-                ("Care Tips", plant.get('care_tips')), ("Additional Details", plant.get('cultivation_details'))
-            ],
-            "Medicinal": [
-                ("Medicinal Uses", plant.get('medicinal_uses')), ("Medicinal Properties", plant.get('medicinal_properties')),
-                ("Edible Parts", plant.get('edible_parts')), ("Edible Uses", plant.get('edible_uses')),
-                ("Other Uses", plant.get('other_uses')), ("Usage Parts", plant.get('usage_parts')),
-                ("Medicinal Description", plant.get('medicinal_description')), ("Edible Description", plant.get('edible_parts_description'))
-            ],
-            "Botanical": [
-                ("Plant Type", plant.get('plant_type')), ("Leaf Type", plant.get('leaf_type')),
-                ("Habit", plant.get('habit')), ("USDA Hardiness Zone", plant.get('usda_hardiness_zone')),
-                ("Physical Characteristics", plant.get('physical_characteristics'))
-            ],
-            "Hazards": [
-                ("Known Hazards", plant.get('known_hazards', 'No known hazards recorded')), ("Storage", plant.get('storage')),
-                ("Weed Potential", plant.get('weed_potential'))
-            ],
-            "Distribution": [
-                ("Native Range", plant.get('native_range', 'No distribution information available')), ("Other Names", plant.get('other_names')),
-                ("Traditional Systems", plant.get('traditional_systems')), ("Search Tags", plant.get('search_tags')),
-                ("Slug", plant.get('slug'))
-            ]
-        }.items():
-            elements.append(Paragraph(section_name, section_style))
-            section_items = []
-            for label, value in items:
-                if value is not None:
-                    text = f"<b>{label}:</b> {', '.join(str(v) for v in value) if isinstance(value, (list, tuple)) else str(value)}"
-                    section_items.append(Paragraph(text, item_style))
-            if section_items:
-                elements.extend(section_items)
-            elements.append(Spacer(1, 0.25*inch))
-
-        # Build the PDF with header and footer
-        doc.build(elements, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
-
-        # Return PDF as response with CORS headers
-        buffer.seek(0)
-        response = Response(buffer, mimetype='application/pdf', headers={
+        # Cached by content hash; misses render in the PDF process pool, off this thread
+        pdf = plant_reports.get(plant, document.etag)
+
+        response = Response(pdf, mimetype='application/pdf', headers={
             'Content-Disposition': f'attachment; filename={name}_Plant_Report.pdf'
         })
+        set_validators(response, pdf_etag, document.last_modified)
         return set_cors_headers(response)
 
     except Exception as e:
         logger.error(f"Error generating PDF: {str(e)}", exc_info=True)
         error_response = jsonify({"error": "Failed to generate PDF", "details": str(e)})
-        return set_cors_headers(error_response), 500
\ No newline at end of file
+        return set_cors_headers(error_response), 500
+
+@plant_bp.route('/api/generate-pdf/batch', methods=['POST', 'OPTIONS'])
+def generate_pdf_batch():
+    """Reports for several plants: a streamed ZIP of PDFs (default) or one combined PDF (format=pdf)."""
+    if request.method == 'OPTIONS':
+        return handle_options_response(methods="POST, OPTIONS", headers="Content-Type, Content-Disposition, X-Requested-With, Authorization")
+
+    data = request.get_json(silent=True) or {}
+    names = data.get('names')
+    output = data.get('format', 'zip')
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        response = jsonify({"error": "names must be a list of plant names"})
+        return set_cors_headers(response), 400
+    names = list(dict.fromkeys(n.strip() for n in names if n.strip()))  # dedupe, keep order
+    if not names:
+        response = jsonify({"error": "At least one plant name is required"})
+        return set_cors_headers(response), 400
+    if output not in ('zip', 'pdf'):
+        response = jsonify({"error": "format must be 'zip' or 'pdf'"})
+        return set_cors_headers(response), 400
+    limit = BATCH_MAX_PLANTS if output == 'zip' else COMBINED_PDF_MAX_PLANTS
+    if len(names) > limit:
+        response = jsonify({"error": f"At most {limit} plants per {output} export"})
+        return set_cors_headers(response), 400
+
+    try:
+        # Upstream lookups run concurrently (and come from the per-plant cache when warm)
+        documents, missing = [], []
+        for name, document in plant_documents.get_many(names):
+            if isinstance(document, Exception):
+                logger.error(f"Failed to fetch plant '{name}' for batch export: {document}")
+            if not document or isinstance(document, Exception) or not document.plant.get('common_name'):
+                missing.append(name)
+            else:
+                documents.append(document)
+        if not documents:
+            response = jsonify({"error": "None of the requested plants were found", "missing": missing})
+            return set_cors_headers(response), 404
+
+        # Names are user input: percent-encode each one so the header stays single-line ASCII
+        headers = {'X-Missing-Plants': ','.join(quote(name, safe='') for name in missing),
+                   'Access-Control-Expose-Headers': 'X-Missing-Plants, Content-Disposition'}
+        if output == 'pdf':
+            pdf = plant_reports.combined([document.plant for document in documents])
+            headers['Content-Disposition'] = 'attachment; filename=Plant_Reports.pdf'
+            return set_cors_headers(Response(pdf, mimetype='application/pdf', headers=headers))
+
+        # Each report is written to the client as soon as it is ready
+        headers['Content-Disposition'] = 'attachment; filename=Plant_Reports.zip'
+        stream = stream_with_context(plant_reports.iter_zip(documents, missing=missing))
+        return set_cors_headers(Response(stream, mimetype='application/zip', headers=headers))
+
+    except Exception as e:
+        logger.error(f"Error generating batch PDF export: {str(e)}", exc_info=True)
+        error_response = jsonify({"error": "Failed to generate PDF export", "details": str(e)})
+        return set_cors_headers(error_response), 500
@@ -1,39 +1,27 @@
 from flask import Blueprint, request, jsonify
-from sentence_transformers import util
-import requests
-import torch
 import numpy as np
 import re
 import os
-import pickle
 import sys # Used for clean logging on startup
+from services.embedding_service import embed_query, warm_up
+from services.search_ranking import semantic_scores, hybrid_scores, candidate_hybrid_scores, top_k_indices
+from services.plant_catalogue import plant_catalogue
+from services.search_service import get_search_index, refresh_search_index, start_reloader
 
 search_bp = Blueprint("search_bp", __name__)
 
 # ===== CONFIG =====
-API_URL = "https://plant-api-buj0.onrender.com/api/plants"
-API_KEY = "mysecretkey123"
-HF_API = "https://api-inference.huggingface.co/models/sentence-transformers/paraphrase-MiniLM-L3-v2"
 BOOST_WEIGHT = 0.4
+ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES", "200"))  # semantic candidates re-ranked with keyword boost
 
-# Calculate path to cached_search_data.pkl (up one level from 'routes')
-# This path relies on the .pkl file being in the 'backend' directory.
-CACHED_DATA_PATH = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)), "cached_search_data.pkl"
-)
-
-# ===== GLOBAL CACHE =====
-plants_data = None
-plant_embeddings = None
+# The loaded index (plants, embeddings, keyword + ANN index) lives in services/search_service
+# and is hot-swapped when generate_embeddings.py publishes a new version.
 
 # ===== HELPER FUNCTIONS (NOW INCLUDED FOR COMPLETENESS) =====
 
 def fetch_plant_data():
-    """Fetches raw plant data from the external API."""
-    headers = {"x-api-key": API_KEY}
-    response = requests.get(API_URL, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    """Raw plant data, served from the shared plant catalogue."""
+    return plant_catalogue.get_all()
 
 def clean_query(q):
     """Cleans and standardizes the search query."""
@@ -44,15 +32,6 @@ def tokenize_text(text):
     """Tokenizes text for keyword matching."""
     return set(re.findall(r"\b\w+\b", text.lower()))
 
-def keyword_boost_score(query_tokens, plant):
-    """Calculates a keyword score based on medicinal fields."""
-    fields = []
-    fields.extend(plant.get("medicinal_properties", []))
-    fields.extend(plant.get("medicinal_uses", []))
-    txt = " ".join(fields).lower()
-    plant_tokens = set(re.findall(r"\b\w+\b", txt))
-    return len(query_tokens.intersection(plant_tokens)) / max(len(query_tokens), 1)
-
 def merge_plant_text(plant):
     """Merges all searchable fields into one string, handling mixed types."""
     def list_to_text(lst): return ", ".join(str(i) for i in lst if i)
@@ -64,42 +43,6 @@ def merge_plant_text(plant):
         if v: text_parts.append(f"{k}: {v}")
     return ". ".join(text_parts)
 
-# ===== REMOTE EMBEDDING (FOR QUERY ONLY) =====
-def get_remote_embedding(text):
-    """Generates a single embedding vector for the user's query."""
-    try:
-        r = requests.post(HF_API, json={"inputs": text}, timeout=20)
-        data = r.json()
-        if isinstance(data, list) and len(data) > 0:
-            return np.array(data[0], dtype=np.float32)
-    except Exception:
-        # In a deployment environment, avoid excessive logging for expected errors
-        pass 
-    return np.zeros(384, dtype=np.float32)
-
-# ===== LOAD DATA (EFFICIENT LOADING) =====
-def load_cached_data():
-    """Loads pre-calculated plant data and embeddings from the local file."""
-    global plants_data, plant_embeddings
-    if plants_data is not None and plant_embeddings is not None:
-        return
-        
-    print(f"⏳ Loading cached search data from: {CACHED_DATA_PATH}", file=sys.stderr)
-    try:
-        with open(CACHED_DATA_PATH, "rb") as f:
-            combined_data = pickle.load(f)
-            
-        plants_data = combined_data["plants_data"]
-        # Convert numpy array back to PyTorch tensor
-        plant_embeddings = torch.tensor(combined_data["embeddings"]) 
-        print(f"✅ Cached data loaded successfully. {len(plants_data)} plants.", file=sys.stderr)
-        
-    except FileNotFoundError:
-        print(f"❌ ERROR: Cached data file not found at {CACHED_DATA_PATH}. Search disabled.", file=sys.stderr)
-    except Exception as e:
-        print(f"❌ ERROR loading cached data: {e}. Search disabled.", file=sys.stderr)
-
-
 # ===== SEARCH ENDPOINT =====
 @search_bp.route("/api/search_plants", methods=["POST"])
 def search_plants():
@@ -109,43 +52,58 @@ def search_plants():
     if not query:
         return jsonify({"error": "Query is required"}), 400
 
-    # Ensure data is loaded (it should be loaded on startup, but this acts as a fallback)
-    load_cached_data() 
-    
-    # Check if data loaded successfully (e.g., if .pkl file was missing)
-    if plants_data is None:
+    # One snapshot per request: a concurrent hot reload can't mix old and new data
+    index = get_search_index()
+    if index is None:
+        # Ensure data is loaded (it should be loaded on startup, but this acts as a fallback)
+        refresh_search_index()
+        index = get_search_index()
+
+    # Check if data loaded successfully (e.g., if the index files were missing)
+    if index is None:
         return jsonify({"error": "Server data not ready for search."}), 503
+    plants_data, plant_embeddings = index.plants, index.embeddings
 
     query_clean = clean_query(query)
     query_tokens = tokenize_text(query_clean)
     
-    # Get embedding for the current query (requires API call)
-    query_emb = torch.tensor(get_remote_embedding(query_clean)).unsqueeze(0)
+    # Get embedding for the current query (local model or remote API, see embedding_service)
+    query_vec = embed_query(query_clean)
+
+    # Keyword boost only exists for plants sharing a query token
+    boost_positions, boost_values = index.keyword_index.boost_scores(query_tokens)
+
+    if query_vec is not None and index.ann_index is not None:
+        # Large corpus: score only the ANN neighbourhood plus keyword matches
+        query_unit = query_vec / (np.linalg.norm(query_vec) or 1.0)
+        ann_ids, _ = index.ann_index.search(query_unit, plant_embeddings, max(ANN_CANDIDATES, top_k))
+        candidates = np.union1d(ann_ids, boost_positions)
+        scores = candidate_hybrid_scores(
+            query_vec, plant_embeddings, candidates, boost_positions, boost_values, BOOST_WEIGHT
+        )
+    else:
+        if query_vec is not None:
+            # Cosine similarity against all plants as one matrix-vector product
+            scores = semantic_scores(query_vec, plant_embeddings)
+        else:
+            # No embedding available: rank on keyword boost alone
+            scores = np.zeros(len(plants_data), dtype=np.float32)
+        candidates = np.arange(len(plants_data))
+        scores = hybrid_scores(scores, boost_positions, boost_values, BOOST_WEIGHT)
 
-    # Perform cosine similarity search (efficient on pre-loaded tensor)
-    scores = util.pytorch_cos_sim(query_emb, plant_embeddings)[0] 
-    
-    results = []
-    # Combine semantic score with keyword boost score
-    for i, plant in enumerate(plants_data):
-        base = float(scores[i])
-        boost = keyword_boost_score(query_tokens, plant)
-        # Final combined score
-        results.append((base + BOOST_WEIGHT * boost, i))
-
-    results.sort(key=lambda x: x[0], reverse=True)
-    
     matched = []
-    for score, i in results[:top_k]:
-        p = plants_data[i].copy() # Use a copy to avoid modifying the cached data
-        p["score"] = round(score, 4)
+    for j in top_k_indices(scores, top_k):
+        p = plants_data[candidates[j]].copy() # Use a copy to avoid modifying the cached data
+        p["score"] = round(float(scores[j]), 4)
         matched.append(p)
 
     return jsonify(matched)
 
 # Call the loader once on script import (server startup) to keep the data in memory.
 try:
-    load_cached_data()
+    refresh_search_index()
+    start_reloader()
+    warm_up()
 except Exception as e:
     # Log startup error but allow Flask to start if possible
     print(f"Fatal error during initial data load: {e}", file=sys.stderr)
\ No newline at end of file
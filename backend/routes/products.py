@@ -1,6 +1,7 @@
-from flask import Blueprint, jsonify, request
-from db import plants_collection, seeds_collection, skincare_collection, accessories_collection, medicines_collection
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from bson import ObjectId
+from services import product_search
+from services.product_listing import ListingError, list_products
 
 products_bp = Blueprint('products', __name__)
 
@@ -9,72 +10,80 @@ def serialize_product(product):
     product['_id'] = str(product['_id'])
     return product
 
+def _number_arg(name, kind=float):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return kind(value)
+    except ValueError:
+        raise ListingError(f"{name} must be a number")
+
+
+def stream_json_array(products):
+    """Serializes products one at a time as a JSON array.
+
+    The status line is already sent, so an error mid-stream is logged and the array is
+    closed early: the client gets valid JSON, possibly missing the remaining products.
+    """
+    try:
+        yield "["
+        try:
+            for i, product in enumerate(products):
+                product.pop("_sort", None)
+                yield ("," if i else "") + current_app.json.dumps(serialize_product(product))
+        except Exception as e:
+            print(f"Error while streaming products, list truncated: {e}")
+        yield "]"
+    finally:
+        close = getattr(products, "close", None)
+        if close:
+            close()
+
+
 @products_bp.route('/products', methods=['GET'])
 def get_products():
-    """Fetches all products from all collections."""
+    """Lists products from all collections, streamed as a JSON array.
+
+    Optional: ``category``, ``min_price``, ``max_price``, ``sort`` (id, name, price,
+    rating; ``-`` for descending) and ``limit``/``cursor`` for keyset pages. The cursor
+    for the next page is returned in the ``X-Next-Cursor`` header. Without ``limit`` the
+    whole listing is streamed best-effort (a database error ends the list early); use
+    pages when completeness matters.
+    """
     try:
-        projection = {
-            '_id': 1,
-            'name': 1,
-            'description': 1,
-            'price': 1,
-            'category': 1,
-            'image': 1,
-            'stock': 1,
-            'filters': 1,
-            'careLevel': 1,
-            'lightRequirements': 1,
-            'wateringNeeds': 1,
-            'germinationTime': 1,
-            'bestSeason': 1,
-            'ingredients': 1,
-            'benefits': 1,
-            'material': 1,
-            'size': 1,
-            'dosage': 1,
-            'rating': 1
-        }
-        
-        products = (
-            list(plants_collection.find({}, projection)) +
-            list(seeds_collection.find({}, projection)) +
-            list(skincare_collection.find({}, projection)) +
-            list(accessories_collection.find({}, projection)) +
-            list(medicines_collection.find({}, projection))
+        products, next_cursor = list_products(
+            category=request.args.get('category') or None,
+            min_price=_number_arg('min_price'),
+            max_price=_number_arg('max_price'),
+            sort=request.args.get('sort', 'id'),
+            cursor=request.args.get('cursor') or None,
+            limit=_number_arg('limit', int),
         )
-        
-        products_serialized = [serialize_product(p) for p in products]
-        
-        return jsonify(products_serialized), 200
+    except ListingError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in get_products: {e}")
         return jsonify({"error": str(e)}), 500
 
+    headers = {'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return Response(stream_with_context(stream_json_array(products)), mimetype='application/json', headers=headers)
+
 @products_bp.route('/products/search', methods=['GET'])
 def search_products():
-    """Searches for products based on a query string."""
+    """Searches products by name, category, ingredients and benefits (ranked, prefix-aware)."""
     try:
         query = request.args.get('q', '').strip()
         if not query:
             return jsonify([]), 200
 
-        # Case-insensitive regex for partial match (anywhere in the name)
-        search_regex = {"$regex": query, "$options": "i"}
-
-        projection = {'_id': 1, 'name': 1, 'category': 1, 'image': 1}
-
-        combined_results = (
-            list(plants_collection.find({'name': search_regex}, projection)) +
-            list(seeds_collection.find({'name': search_regex}, projection)) +
-            list(skincare_collection.find({'name': search_regex}, projection)) +
-            list(accessories_collection.find({'name': search_regex}, projection)) +
-            list(medicines_collection.find({'name': search_regex}, projection))
-        )
-        
-        results = [serialize_product(p) for p in combined_results]
-        
-        return jsonify(results[:10]), 200
+        limit = _number_arg('limit', int) or 10
+        return jsonify(product_search.search_products(query, limit=limit)), 200
 
+    except ListingError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in search_products: {e}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
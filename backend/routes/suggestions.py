@@ -1,16 +1,11 @@
 from flask import Blueprint, request, jsonify, make_response, Response
-import requests
 import logging
-from functools import lru_cache
+from services.plant_catalogue import plant_catalogue
+from services.autocomplete import AutocompleteIndex
 
 suggestion_bp = Blueprint("suggestion", __name__)
 
 # --- CONFIGURATION (CORS FIX APPLIED HERE) ---
-API_URL = "https://plant-api-buj0.onrender.com/api/plants"
-API_KEY = "mysecretkey123" 
-HEADERS = {
-    "x-api-key": API_KEY
-}
 # FIX: Include both local and production origins
 ALLOWED_ORIGINS = ["http://localhost:5173", "https://ayurkosh.onrender.com"] 
 # ---------------------
@@ -39,20 +34,8 @@ def set_cors_headers(response, methods="GET, POST, OPTIONS", headers="Content-Ty
 
 # ---------- Caching Logic ----------
 
-@lru_cache(maxsize=1)
-def fetch_all_plants():
-    """Fetch all plants from the external API for suggestion lookup."""
-    try:
-        logger.info("🔄 Fetching all plants from external API...")
-        response = requests.get(API_URL, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"✅ Fetched {len(data)} plants.")
-        return data
-    except Exception as e:
-        logger.error(f"❌ Error fetching plants: {e}", exc_info=True)
-        # Raising the exception ensures we catch it in the endpoint handler
-        raise
+# Name autocomplete index, rebuilt alongside each catalogue refresh
+plant_catalogue.register_index("autocomplete", AutocompleteIndex)
 
 # ---------- Endpoint with CORS and Error Handling ----------
 
@@ -72,26 +55,18 @@ def suggest_plants():
 
     try:
         # 2. Fetch and search logic
-        all_plants = fetch_all_plants()
-        logger.info(f"🔍 Searching prefix-matching suggestions for: '{query}'")
+        logger.info(f"🔍 Searching suggestions for: '{query}'")
 
-        matches = [] 
-        for plant in all_plants:
-            common = plant.get("common_name", "").lower()
-            botanical = plant.get("botanical_name", "").lower()
-            if common.startswith(query) or botanical.startswith(query):
-                matches.append({
-                    "common_name": plant.get("common_name", ""),
-                    "botanical_name": plant.get("botanical_name", "")
-                })
+        # Prefix lookup on the prebuilt autocomplete index, topped up with typo-tolerant matches
+        matches = plant_catalogue.index("autocomplete").suggest(query, limit=10)
 
         logger.info(f"✅ Found {len(matches)} matching plants.")
-        json_response = jsonify(matches[:10])
+        json_response = jsonify(matches)
         # Apply CORS to final response
         return set_cors_headers(json_response), 200
         
     except Exception as e:
-        # 3. Robust Error Handling (Catches 502/Network Errors from fetch_all_plants)
+        # 3. Robust Error Handling (Catches 502/Network Errors from the plant catalogue)
         logger.error(f"❌ Error in suggest_plants endpoint: {e}", exc_info=True)
         error_response = jsonify({"error": "Failed to fetch plant suggestions due to a server or external API error."})
         # Apply CORS to error response
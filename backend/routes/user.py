@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from db import users_collection
 from bson.objectid import ObjectId
-from db import plants_collection, seeds_collection, skincare_collection, accessories_collection, medicines_collection
+from services.product_router import product_router
 from bson import ObjectId
 from datetime import datetime, timezone, timedelta
 from pymongo import UpdateOne
@@ -241,22 +241,10 @@ def get_wishlist_details():
             return jsonify([]), 200
 
         # ✅ Direct string match because your product _id is like "plant003"
-        collections = [
-            plants_collection,
-            seeds_collection,
-            skincare_collection,
-            accessories_collection,
-            medicines_collection
-        ]
-
-        products = []
-        for col in collections:
-            found = list(col.find({"_id": {"$in": wishlist_ids}},
-                                  {"_id": 1, "name": 1, "image": 1, "category": 1}))
-            print(f"Found {len(found)} products in {col.name}")
-            for p in found:
-                p["_id"] = str(p["_id"])
-                products.append(p)
+        # One $in query per category that actually holds wishlist items
+        products = product_router.find_many(wishlist_ids, {"_id": 1, "name": 1, "image": 1, "category": 1})
+        for p in products:
+            p["_id"] = str(p["_id"])
 
         print(f"Returning {len(products)} wishlist products")
         return jsonify(products), 200
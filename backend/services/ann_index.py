@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+
+from services.search_ranking import top_k_indices
+
+
+class IVFIndex:
+    """Inverted-file (IVF) approximate nearest-neighbour index over normalized embeddings.
+
+    Vectors are clustered with spherical k-means; each cluster keeps the ids of its
+    members in one contiguous slice. A query scores only the ``nprobe`` clusters whose
+    centroids are closest to it instead of the whole matrix.
+    """
+
+    def __init__(self, centroids, list_offsets, list_ids, nprobe=16):
+        self.centroids = centroids        # (nlist, dim) float32, unit length
+        self.list_offsets = list_offsets  # (nlist + 1,) start of each cluster in list_ids
+        self.list_ids = list_ids          # (n,) row ids grouped by cluster
+        self.nprobe = nprobe
+
+    @property
+    def size(self):
+        return len(self.list_ids)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, nlist=None, iterations=10, sample_size=50_000, seed=0, nprobe=16):
+        """Clusters L2-normalized ``embeddings`` into ``nlist`` lists (default ~sqrt(n))."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        n = len(embeddings)
+        nlist = max(1, min(n, nlist or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+
+        # Train centroids on a sample, then assign every vector
+        sample = embeddings[rng.choice(n, size=min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest_centroid(sample, centroids)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+                else:
+                    # Re-seed empty clusters so every list stays useful
+                    centroids[c] = sample[rng.integers(len(sample))]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+
+        assignment = _nearest_centroid(embeddings, centroids)
+        list_ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=nlist)
+        list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(centroids.astype(np.float32), list_offsets, list_ids, nprobe=nprobe)
+
+    def candidates(self, query_vec, nprobe=None):
+        """Sorted row ids of every vector in the ``nprobe`` clusters closest to the query."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probe = top_k_indices(self.centroids @ query_vec, nprobe)
+        ids = [self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe]
+        return np.sort(np.concatenate(ids)) if ids else np.empty(0, dtype=np.int64)
+
+    def search(self, query_vec, embeddings, k, nprobe=None):
+        """Approximate top-``k`` ``(ids, scores)`` for a unit-length query."""
+        ids = self.candidates(query_vec, nprobe)
+        scores = embeddings[ids] @ query_vec
+        best = top_k_indices(scores, k)
+        return ids[best], scores[best]
+
+    def save(self, directory):
+        np.save(os.path.join(directory, "ann_centroids.npy"), self.centroids)
+        np.save(os.path.join(directory, "ann_list_offsets.npy"), self.list_offsets)
+        np.save(os.path.join(directory, "ann_list_ids.npy"), self.list_ids)
+
+    @classmethod
+    def load(cls, directory, nprobe=16):
+        """Opens a saved index; the arrays are memory-mapped read-only."""
+        def mapped(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+        return cls(mapped("ann_centroids.npy"), mapped("ann_list_offsets.npy"), mapped("ann_list_ids.npy"), nprobe=nprobe)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, "ann_list_ids.npy"))
+
+
+def _nearest_centroid(vectors, centroids, chunk=8192):
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return assignment
@@ -0,0 +1,68 @@
+import re
+from bisect import bisect_left
+
+from services.fuzzy_index import FuzzyNameIndex
+
+_SPACES = re.compile(r"\s+")
+
+# Lower rank wins when two names of the same plant tie on the key
+NAME_FIELDS = (("common_name", 0), ("botanical_name", 1), ("other_names", 2))
+
+
+def normalize_name(name):
+    return _SPACES.sub(" ", str(name).strip().lower())
+
+
+def plant_names(plant):
+    """Yields ``(name, rank)`` for every searchable name of a plant."""
+    for field, rank in NAME_FIELDS:
+        value = plant.get(field)
+        for name in value if isinstance(value, list) else [value]:
+            if name:
+                yield str(name), rank
+
+
+def suggestion_payload(plant):
+    return {
+        "common_name": plant.get("common_name", ""),
+        "botanical_name": plant.get("botanical_name", ""),
+    }
+
+
+class AutocompleteIndex:
+    """Sorted array of normalized plant names searched with bisect.
+
+    All names sharing a prefix are contiguous, so a lookup is one binary search plus
+    a walk over at most ``limit`` plants. Completions come back in key order, which
+    puts exact and shorter matches before longer ones. When fewer than ``limit`` plants
+    share the prefix, the rest are filled from a typo-tolerant trigram index.
+    """
+
+    def __init__(self, plants):
+        entries = sorted(
+            (normalize_name(name), rank, position)
+            for position, plant in enumerate(plants)
+            for name, rank in plant_names(plant)
+        )
+        self._keys = [key for key, _, _ in entries]
+        self._positions = [position for _, _, position in entries]
+        self._payloads = [suggestion_payload(plant) for plant in plants]
+        self._fuzzy = FuzzyNameIndex(entries)
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        keys, positions = self._keys, self._positions
+        i = bisect_left(keys, prefix)
+        seen, results = set(), []
+        while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+            position = positions[i]
+            if position not in seen:
+                seen.add(position)
+                results.append(self._payloads[position])
+            i += 1
+        if len(results) < limit:
+            for position in self._fuzzy.suggest_positions(prefix, limit - len(results), exclude=seen):
+                results.append(self._payloads[position])
+        return results
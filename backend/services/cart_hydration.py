@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+# Fields a cart line needs from the product document
+CART_PRODUCT_PROJECTION = {"_id": 1, "name": 1, "price": 1, "image": 1, "category": 1, "stock": 1}
+
+
+def valid_cart_items(cart):
+    """Cart entries that carry both a product id and a category."""
+    return [
+        item for item in cart or []
+        if isinstance(item, dict) and "product_id" in item and "category" in item
+    ]
+
+
+def fetch_products(items, collection_for, projection=None):
+    """Loads the products referenced by ``items`` with one ``$in`` query per category.
+
+    ``collection_for`` maps a category to its collection (or None for unknown
+    categories). Returns ``{(category, product_id): product}`` for the products found.
+    """
+    ids_by_category = defaultdict(dict)  # ordered set of ids per category
+    for item in items:
+        ids_by_category[item["category"]][item["product_id"]] = None
+
+    products = {}
+    for category, ids in ids_by_category.items():
+        collection = collection_for(category)
+        if collection is None:
+            continue
+        for product in collection.find({"_id": {"$in": list(ids)}}, projection):
+            products[(category, product["_id"])] = product
+    return products
+
+
+def hydrate_cart(cart, collection_for):
+    """Cart lines joined with their products, in cart order.
+
+    Returns ``(cart_items, missing)``; ``missing`` lists the cart entries whose
+    product no longer exists (or whose category is unknown).
+    """
+    items = valid_cart_items(cart)
+    products = fetch_products(items, collection_for, CART_PRODUCT_PROJECTION)
+
+    cart_items, missing = [], []
+    for item in items:
+        product = products.get((item["category"], item["product_id"]))
+        if not product:
+            missing.append({"product_id": str(item["product_id"]), "category": item["category"]})
+            continue
+        cart_items.append({
+            "_id": str(product['_id']),
+            "name": product.get('name', 'Unknown'),
+            "price": product.get('price', 0),
+            "image": product.get('image', ''),
+            "category": product.get('category', ''),
+            "stock": product.get('stock', 0),
+            "quantity": item.get('quantity', 0)
+        })
+    return cart_items, missing
@@ -1,8 +1,7 @@
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 import os
+from services.http_client import http_client
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -20,11 +19,8 @@ def get_gemini_response(user_message):
     }
 
     try:
-        session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        session.mount("https://", HTTPAdapter(max_retries=retries))
-        
-        response = session.post(url, params=params, json=payload, timeout=30)
+        # Shared keep-alive pool: no new session or TLS handshake per chat message
+        response = http_client.post(url, params=params, json=payload, timeout=30)
         print("API Response:", response.text)  # Log for debugging
         response.raise_for_status()
         result = response.json()
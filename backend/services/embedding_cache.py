@@ -0,0 +1,131 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))      # entries kept in memory per worker
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))       # seconds
+EMBEDDING_CACHE_DISK_TTL = float(os.getenv("EMBEDDING_CACHE_DISK_TTL", str(7 * 24 * 3600)))
+EMBEDDING_CACHE_DISK_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ROWS", "100000"))
+# Shared by all gunicorn workers on the host; set to an empty string to disable the disk tier.
+EMBEDDING_CACHE_DB = os.getenv(
+    "EMBEDDING_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "query_embeddings.sqlite3"),
+)
+_PRUNE_EVERY = 500  # disk writes between size checks
+
+
+class DiskEmbeddingStore:
+    """SQLite-backed embedding tier that survives worker restarts."""
+
+    def __init__(self, path, ttl, max_rows):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+        self._conn_pid = None
+        self._connection()  # fail fast if the file can't be opened
+
+    def _connection(self):
+        # SQLite connections must not cross a fork, so each worker opens its own.
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time() - self.ttl:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def set(self, key, vector):
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune()
+
+    def _prune(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM query_embeddings WHERE created_at < ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM query_embeddings WHERE key IN ("
+            " SELECT key FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+
+class QueryEmbeddingCache:
+    """Two-tier (memory LRU + optional SQLite) cache of query embeddings."""
+
+    def __init__(self, maxsize, ttl, disk_path=None, disk_ttl=None, disk_max_rows=None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = None
+        self.disk_hits = 0
+        if disk_path:
+            try:
+                self.disk = DiskEmbeddingStore(disk_path, disk_ttl or ttl, disk_max_rows or maxsize)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Disk embedding cache disabled ({disk_path}): {e}")
+
+    def get(self, key):
+        vector = self.memory.get(key)
+        if vector is not None or self.disk is None:
+            return vector
+        try:
+            vector = self.disk.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Disk embedding cache read failed: {e}")
+            return None
+        if vector is not None:
+            self.disk_hits += 1
+            self.memory.set(key, vector)
+        return vector
+
+    def set(self, key, vector):
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, vector)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Disk embedding cache write failed: {e}")
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["disk_enabled"] = self.disk is not None
+        stats["disk_hits"] = self.disk_hits
+        return stats
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    maxsize=EMBEDDING_CACHE_SIZE,
+    ttl=EMBEDDING_CACHE_TTL,
+    disk_path=EMBEDDING_CACHE_DB,
+    disk_ttl=EMBEDDING_CACHE_DISK_TTL,
+    disk_max_rows=EMBEDDING_CACHE_DISK_MAX_ROWS,
+)
@@ -0,0 +1,186 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import requests
+from dotenv import load_dotenv
+
+from services.embedding_cache import query_embedding_cache
+from services.http_client import http_client
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+# "local" runs the model inside the worker, "remote" uses the Hugging Face inference API.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local").strip().lower()
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-MiniLM-L3-v2")
+EMBEDDING_DIM = 384
+HF_API = f"https://api-inference.huggingface.co/models/{MODEL_NAME}"
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "20"))
+
+# Local backend tuning
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "2"))      # torch CPU threads per worker
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))  # how long to wait for more queries
+EMBEDDING_QUERY_TIMEOUT = float(os.getenv("EMBEDDING_QUERY_TIMEOUT", "10"))
+
+
+class EmbeddingError(RuntimeError):
+    """Raised when a backend cannot produce embeddings."""
+
+
+# ===== REMOTE BACKEND (HUGGING FACE INFERENCE API) =====
+class RemoteEmbeddingBackend:
+    """Embeds texts through the Hugging Face inference API."""
+    name = "remote"
+
+    def embed_batch(self, texts):
+        texts = list(texts)
+        try:
+            r = http_client.post(HF_API, json={"inputs": texts}, timeout=HF_TIMEOUT)
+            data = r.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise EmbeddingError(f"Hugging Face request failed: {e}") from e
+
+        if isinstance(data, dict):
+            # e.g. {"error": "Model ... is currently loading", "estimated_time": 20.0}
+            raise EmbeddingError(f"Hugging Face error: {data.get('error', data)}")
+
+        vectors = np.asarray(data, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        elif vectors.ndim == 3:
+            # Token-level output: mean-pool to one vector per text
+            vectors = vectors.mean(axis=1)
+        if vectors.shape != (len(texts), EMBEDDING_DIM):
+            raise EmbeddingError(f"Unexpected embedding shape {vectors.shape} for {len(texts)} texts")
+        return vectors
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+
+# ===== LOCAL BACKEND (IN-PROCESS, CPU) =====
+class LocalEmbeddingBackend:
+    """Runs the sentence-transformers model in-process.
+
+    The model is loaded once per worker. Concurrent ``embed`` calls are queued and
+    encoded together by a single batching thread, so a burst of searches costs one
+    forward pass instead of one per request.
+    """
+    name = "local"
+
+    def __init__(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(EMBEDDING_THREADS)
+        started = time.perf_counter()
+        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+        logger.info(f"✅ Loaded local embedding model {MODEL_NAME} in {time.perf_counter() - started:.1f}s")
+
+        self._queue = queue.Queue()
+        self._batcher = threading.Thread(target=self._run_batcher, name="embedding-batcher", daemon=True)
+        self._batcher.start()
+
+    def embed_batch(self, texts):
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+    def embed(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=EMBEDDING_QUERY_TIMEOUT)
+
+    def _run_batcher(self):
+        wait = EMBEDDING_BATCH_WAIT_MS / 1000.0
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + wait
+            while len(batch) < EMBEDDING_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self.embed_batch([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(EmbeddingError(f"Local embedding failed: {e}"))
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+# ===== BACKEND SELECTION =====
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name, fallback=True):
+    """Builds a backend by name ("local" or "remote").
+
+    With ``fallback`` (the web workers) local falls back to remote if the model can't
+    load; without it (offline jobs) the load error is raised instead.
+    """
+    if name == "remote":
+        return RemoteEmbeddingBackend()
+    if name != "local":
+        if not fallback:
+            raise ValueError(f"Unknown embedding backend '{name}'")
+        logger.warning(f"⚠️ Unknown EMBEDDING_BACKEND '{name}', using local.")
+    try:
+        return LocalEmbeddingBackend()
+    except Exception as e:
+        if not fallback:
+            raise EmbeddingError(f"Could not load local embedding model {MODEL_NAME}: {e}") from e
+        logger.error(f"❌ Could not load local embedding model ({e}). Falling back to remote backend.")
+        return RemoteEmbeddingBackend()
+
+
+def get_embedder():
+    """Returns the process-wide embedding backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(EMBEDDING_BACKEND)
+    return _backend
+
+
+def warm_up():
+    """Loads the backend in a background thread so the first search doesn't pay for it."""
+    threading.Thread(target=get_embedder, name="embedding-warmup", daemon=True).start()
+
+
+def embed_query(text):
+    """Embeds a single (already cleaned) query, serving repeats from the query embedding cache.
+
+    Returns None (and logs why) if no embedding could be produced; failures are not cached.
+    """
+    # Keyed on configuration, so a cache hit never waits for the model to load
+    cache_key = f"{EMBEDDING_BACKEND}:{MODEL_NAME}:{text}"
+    vector = query_embedding_cache.get(cache_key)
+    if vector is not None:
+        return vector
+    try:
+        vector = get_embedder().embed(text)
+    except Exception as e:
+        logger.warning(f"⚠️ Query embedding failed, falling back to keyword-only ranking: {e}")
+        return None
+    query_embedding_cache.set(cache_key, vector)
+    return vector
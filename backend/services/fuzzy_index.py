@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+import numpy as np
+
+# Shorter queries are still being typed; prefix matches alone are more useful there
+MIN_QUERY_LENGTH = 4
+# Candidates (by shared trigrams) that get an exact edit-distance check per query
+MAX_CANDIDATES = 100
+
+
+def trigrams(text):
+    """Character trigrams of ``text``, padded so short words and word starts still count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(query):
+    """Edit distance still treated as a typo for a query of this length."""
+    if len(query) <= 4:
+        return 1
+    if len(query) <= 8:
+        return 2
+    return 3
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between ``a`` and ``b``, or ``limit + 1`` once it is known to exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def typed_distance(query, key, limit):
+    """Distance from ``query`` to ``key`` or to the start of ``key`` (the user may still be typing)."""
+    return min(edit_distance(query, key, limit), edit_distance(query, key[:len(query)], limit))
+
+
+class FuzzyNameIndex:
+    """Trigram index over plant names for typo-tolerant lookups.
+
+    Keys are the full normalized names plus their individual words, so "tenuiflorm"
+    still finds "ocimum tenuiflorum". A query counts shared trigrams per key with one
+    ``bincount`` over the posting lists, then runs a bounded edit distance only on the
+    best ``MAX_CANDIDATES`` keys instead of on every name.
+    """
+
+    def __init__(self, entries):
+        """``entries`` is an iterable of ``(normalized name, rank, position)``."""
+        owners = defaultdict(list)
+        for name, rank, position in entries:
+            owners[name].append((rank, position))
+            for word in name.split(" "):
+                if len(word) >= 4 and word != name:
+                    owners[word].append((rank + 1, position))  # whole-name matches rank first
+        self._keys = list(owners)
+        self._owners = [sorted(set(owners[key])) for key in self._keys]
+        postings = defaultdict(list)
+        for key_id, key in enumerate(self._keys):
+            for gram in trigrams(key):
+                postings[gram].append(key_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def suggest_positions(self, query, limit=10, exclude=()):
+        """Plant positions whose names are within a few typos of ``query``, closest first."""
+        if len(query) < MIN_QUERY_LENGTH or limit <= 0:
+            return []
+        hits = [self._postings[g] for g in trigrams(query) if g in self._postings]
+        if not hits:
+            return []
+        shared = np.bincount(np.concatenate(hits), minlength=len(self._keys))
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], MAX_CANDIDATES)[:MAX_CANDIDATES]]
+
+        allowed = max_typos(query)
+        scored = []
+        for key_id in candidates:
+            key = self._keys[key_id]
+            distance = typed_distance(query, key, allowed)
+            if distance <= allowed:
+                for rank, position in self._owners[key_id]:
+                    scored.append((distance, rank, -int(shared[key_id]), len(key), position))
+        scored.sort()
+
+        seen, results = set(exclude), []
+        for *_, position in scored:
+            if position not in seen:
+                seen.add(position)
+                results.append(position)
+                if len(results) == limit:
+                    break
+        return results
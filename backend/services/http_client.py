@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+load_dotenv()
+
+# ===== CONFIG =====
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))        # hosts with a kept-alive pool
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))          # idle connections kept per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+# Failed connection attempts are retried for every call (nothing was sent yet, so it is cheap and safe)
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "1"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# Read timeouts and these statuses are retried only for callers that opt in with ``retries=``
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class HostMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.statuses = defaultdict(int)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(self.total_seconds * 1000 / self.requests, 1) if self.requests else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "statuses": dict(self.statuses),
+        }
+
+
+class HttpClient:
+    """Process-wide outbound HTTP client.
+
+    One ``requests.Session`` with a connection pool per host, so repeated calls to the
+    same API reuse kept-alive TLS connections instead of handshaking every time.
+    Applies default timeouts and records per-host latency and error counts. Only failed
+    connects are retried by default; a caller that can afford to wait passes
+    ``retries=`` to also retry timeouts and 429/5xx answers of idempotent requests.
+    The session is recreated after a fork so workers never share sockets.
+    """
+
+    def __init__(self, connect_retries=HTTP_CONNECT_RETRIES, backoff=HTTP_BACKOFF,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 pool_hosts=HTTP_POOL_HOSTS, pool_size=HTTP_POOL_SIZE):
+        self.connect_retries = connect_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.pool_hosts = pool_hosts
+        self.pool_size = pool_size
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(HostMetrics)
+
+    def _build_session(self):
+        retry = Retry(total=None, connect=self.connect_retries, read=0, status=0, other=0, redirect=None)
+        adapter = HTTPAdapter(pool_connections=self.pool_hosts, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def request(self, method, url, timeout=None, retries=0, **kwargs):
+        host = urlsplit(url).netloc
+        retries = retries if method.upper() in IDEMPOTENT_METHODS else 0
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except requests.exceptions.RequestException:
+                self._record(host, started, None)
+                if attempt == retries:
+                    raise
+            else:
+                self._record(host, started, response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                response.close()
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, host, started, status):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            metrics = self._metrics[host]
+            metrics.requests += 1
+            metrics.total_seconds += elapsed
+            metrics.max_seconds = max(metrics.max_seconds, elapsed)
+            if status is None or status >= 500:
+                metrics.errors += 1
+            metrics.statuses[str(status) if status is not None else "error"] += 1
+
+    def _connections_opened(self):
+        """Connections opened per host by the pools that are currently alive."""
+        opened = defaultdict(int)
+        session = self._session
+        if session is None or self._pid != os.getpid():
+            return opened
+        adapters = {id(a): a for a in session.adapters.values()}.values()
+        for adapter in adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                    opened[host] += pool.num_connections
+        return opened
+
+    def stats(self):
+        """Per-host request counts, latency and how many connections were opened (fewer = more reuse)."""
+        opened = self._connections_opened()
+        with self._lock:
+            hosts = {host: metrics.as_dict() for host, metrics in self._metrics.items()}
+        for host, metrics in hosts.items():
+            metrics["connections_opened"] = opened.get(host, 0)
+        return {"pid": os.getpid(), "timeout": self.timeout, "connect_retries": self.connect_retries, "hosts": hosts}
+
+
+http_client = HttpClient()
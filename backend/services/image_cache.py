@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+
+import urllib3
+from dotenv import load_dotenv
+from PIL import Image as PILImage
+
+from services.disk_cache import DiskLRUCache
+from services.http_client import http_client
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "image_cache"),
+)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "128")) * 1024 * 1024
+THUMBNAIL_MAX_PX = int(os.getenv("THUMBNAIL_MAX_PX", "600"))       # 3 inch at 200 dpi
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "5"))   # per download
+IMAGE_DEADLINE = float(os.getenv("IMAGE_DEADLINE", "3"))             # total wait per report
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+BAD_IMAGE_TTL = float(os.getenv("BAD_IMAGE_TTL", "21600"))           # 404s, non-images
+FAILED_IMAGE_TTL = float(os.getenv("FAILED_IMAGE_TTL", "300"))       # timeouts, connection errors
+IMAGE_MAX_FAILURES = int(os.getenv("IMAGE_MAX_FAILURES", "3"))        # failed fetches in a row before a URL counts as bad
+
+# Image hosts are fetched without certificate verification (temporary workaround)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+IMAGE_URL_RE = re.compile(r'.*\.(jpe?g|png|gif|webp|svg|bmp|ico|cms)$', re.IGNORECASE)
+
+
+class BadImage(Exception):
+    """The URL answered, but not with a usable image; retrying soon won't help."""
+
+
+def url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(data):
+    """Downscales image bytes to a JPEG no larger than THUMBNAIL_MAX_PX on either side."""
+    try:
+        with PILImage.open(BytesIO(data)) as img:
+            img.thumbnail((THUMBNAIL_MAX_PX, THUMBNAIL_MAX_PX))
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            out = BytesIO()
+            img.save(out, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    except Exception as e:
+        raise BadImage(f"not a readable image: {e}") from e
+    return out.getvalue()
+
+
+class PlantImageCache:
+    """Downscaled JPEG thumbnails of plant images, keyed by URL.
+
+    Thumbnails live in a host-wide DiskLRUCache, so reports embed a small local
+    image instead of downloading the original. URLs that failed are remembered
+    for a while (longer for 404s and non-images than for timeouts); a URL that
+    times out or refuses ``max_failures`` times in a row is treated as bad, so a
+    dead host stops holding reports back. Candidates
+    that are not cached yet are downloaded in parallel. The caller waits at most
+    ``deadline`` seconds; slower downloads finish in the background and are
+    ready for the next report.
+    """
+
+    def __init__(self, cache_dir=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES, deadline=IMAGE_DEADLINE,
+                 failed_ttl=FAILED_IMAGE_TTL, max_failures=IMAGE_MAX_FAILURES):
+        self.cache = DiskLRUCache(cache_dir, max_bytes, suffix=".jpg")
+        self.deadline = deadline
+        self.failed_ttl = failed_ttl
+        self.max_failures = max_failures
+        self._bad = TTLCache(maxsize=4096, ttl=BAD_IMAGE_TTL)
+        self._failures = TTLCache(maxsize=4096, ttl=BAD_IMAGE_TTL)   # url key -> failed fetches in a row
+        self._in_flight = SingleFlight()
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="image-fetch")
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _submit(self, urls):
+        pool = self._executor()
+        return [pool.submit(self._in_flight.do, url_key(url), self._fetch, url) for url in urls]
+
+    @staticmethod
+    def candidates(plant):
+        """Image URLs of a plant that look like images, in the plant's order."""
+        images = plant.get("images") or []
+        if not isinstance(images, list):
+            return []
+        return [url for url in images if isinstance(url, str) and IMAGE_URL_RE.match(url)]
+
+    def _download(self, url):
+        response = http_client.get(url, headers={"User-Agent": "Mozilla/5.0"}, verify=False,
+                                   timeout=IMAGE_FETCH_TIMEOUT, stream=True)
+        with response:
+            if 400 <= response.status_code < 500:
+                raise BadImage(f"HTTP {response.status_code}")
+            response.raise_for_status()
+            data, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                data.append(chunk)
+                size += len(chunk)
+                if size > IMAGE_MAX_BYTES:
+                    raise BadImage("image too large")
+        return b"".join(data)
+
+    def _fetch(self, url):
+        key = url_key(url)
+        try:
+            thumbnail = make_thumbnail(self._download(url))
+        except BadImage as e:
+            logger.warning(f"⚠️ Unusable image {url}: {e}")
+            self._bad.set(key, "bad", ttl=BAD_IMAGE_TTL)
+            raise
+        except Exception as e:
+            # Fetches of one URL are single-flighted, so this count is not raced
+            failures = self._failures.get(key, 0) + 1
+            self._failures.set(key, failures)
+            if failures >= self.max_failures:
+                logger.warning(f"⚠️ Giving up on image {url} after {failures} failed fetches: {e}")
+                self._bad.set(key, "bad", ttl=BAD_IMAGE_TTL)
+            else:
+                logger.warning(f"⚠️ Failed to fetch image {url}: {e}")
+                self._bad.set(key, "failed", ttl=self.failed_ttl)
+            raise
+        self._failures.pop(key)
+        self.cache.set(key, thumbnail)
+        return thumbnail
+
+    def thumbnail(self, urls):
+        """First usable thumbnail among ``urls`` and whether the answer is final.
+
+        Returns ``(jpeg_bytes_or_None, settled)`` as soon as any download succeeds.
+        ``settled`` is False when an earlier (preferred) URL was still downloading, the
+        deadline passed, or a URL failed only transiently, i.e. a later call may do better.
+        A cached URL is returned right away; earlier URLs nobody tried yet are downloaded
+        in the background so that a later call can settle.
+        """
+        pending, transient = [], False
+        for url in urls:
+            key = url_key(url)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if pending:
+                    self._submit(pending)
+                return cached, not pending and not transient
+            known = self._bad.get(key)
+            if known is None:
+                pending.append(url)
+            transient = transient or known == "failed"
+        if not pending:
+            return None, not transient
+
+        futures = self._submit(pending)
+        deadline = time.monotonic() + self.deadline
+        while True:
+            done = [f.done() for f in futures]
+            for i, future in enumerate(futures):
+                if done[i] and future.exception() is None:
+                    # Final only if no earlier (preferred) candidate is still downloading
+                    return future.result(), all(done[:i])
+            if all(done):
+                # Only URLs known to be bad (404s, non-images, dead hosts) are worth remembering in the report
+                return None, not transient and all(self._bad.get(url_key(url)) == "bad" for url in pending)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, False
+            wait([f for f in futures if not f.done()], timeout=remaining, return_when=FIRST_COMPLETED)
+
+    def stats(self):
+        return {**self.cache.stats(), "known_bad": len(self._bad), "failing": len(self._failures),
+                "deadline": self.deadline}
+
+
+plant_images = PlantImageCache()
@@ -0,0 +1,60 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\b\w+\b")
+KEYWORD_FIELDS = ("medicinal_properties", "medicinal_uses")
+
+
+def plant_keyword_tokens(plant):
+    """Returns the set of lowercase tokens in a plant's medicinal fields."""
+    fields = []
+    for field in KEYWORD_FIELDS:
+        fields.extend(str(v) for v in plant.get(field) or [])
+    return set(TOKEN_RE.findall(" ".join(fields).lower()))
+
+
+class KeywordIndex:
+    """Inverted index from medicinal keyword to plant positions.
+
+    Built once per loaded dataset. A query only touches the posting lists of its
+    own tokens, so scoring cost depends on how many plants match rather than on
+    the catalogue size.
+    """
+
+    def __init__(self, postings, size):
+        self.postings = postings  # token -> sorted int64 array of plant positions
+        self.size = size
+
+    @classmethod
+    def from_plants(cls, plants):
+        postings = defaultdict(list)
+        for position, plant in enumerate(plants):
+            for token in plant_keyword_tokens(plant):
+                postings[token].append(position)
+        return cls({token: np.asarray(ids, dtype=np.int64) for token, ids in postings.items()}, len(plants))
+
+    def to_arrays(self):
+        """Flattens the postings into ``(vocab, offsets, ids)`` for on-disk storage."""
+        vocab = sorted(self.postings)
+        lists = [self.postings[token] for token in vocab]
+        offsets = np.concatenate(([0], np.cumsum([len(ids) for ids in lists]))).astype(np.int64)
+        ids = np.concatenate(lists).astype(np.int64) if lists else np.empty(0, dtype=np.int64)
+        return vocab, offsets, ids
+
+    @classmethod
+    def from_arrays(cls, vocab, offsets, ids, size):
+        """Rebuilds the index from ``to_arrays`` output; ``ids`` may be a read-only memmap."""
+        return cls({token: ids[offsets[i]:offsets[i + 1]] for i, token in enumerate(vocab)}, size)
+
+    def boost_scores(self, query_tokens):
+        """Returns ``(positions, scores)`` for plants sharing at least one query token.
+
+        A plant's score is the fraction of query tokens found in its medicinal fields.
+        """
+        hits = [self.postings[t] for t in query_tokens if t in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        positions, counts = np.unique(np.concatenate(hits), return_counts=True)
+        return positions, (counts / max(len(query_tokens), 1)).astype(np.float32)
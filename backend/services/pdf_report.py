@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from itertools import islice
+
+from dotenv import load_dotenv
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from services.disk_cache import DiskLRUCache
+from services.image_cache import plant_images
+from services.single_flight import SingleFlight
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+# Bump when the report layout changes so cached PDFs are not reused
+REPORT_LAYOUT_VERSION = 2
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "pdf_cache"),
+)
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_MB", "256")) * 1024 * 1024
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))  # 0 renders on the request thread
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+# Batch exports: reports rendered ahead of the one being streamed, and plants per combined PDF
+BATCH_RENDER_AHEAD = int(os.getenv("PDF_BATCH_RENDER_AHEAD", "4"))
+COMBINED_PDF_MAX_PLANTS = int(os.getenv("PDF_COMBINED_MAX_PLANTS", "25"))
+MISSING_PLANTS_FILE = "MISSING_PLANTS.txt"  # batch ZIP entry naming the plants that were not found
+# spawn: render processes must not inherit the worker's threads, locks and sockets
+PDF_RENDER_START_METHOD = os.getenv("PDF_RENDER_START_METHOD", "spawn")
+
+
+# ---------- Layout ----------
+def add_header_footer(canvas, doc):
+    """Add header and footer to each page."""
+    canvas.saveState()
+    
+    # Header
+    canvas.setFillColor(colors.darkgreen)
+    canvas.setFont("Helvetica-Bold", 12)
+    canvas.drawString(0.75*inch, doc.pagesize[1] - 0.5*inch, "Plant Information Report")
+    
+    # Footer
+    canvas.setFillColor(colors.grey)
+    canvas.setFont("Helvetica", 8)
+    # No generation date: rendered reports are cached and served for as long as the plant is unchanged
+    footer_text = f"Plant Information Report | Page {doc.page}"
+    canvas.drawString(0.75*inch, 0.5*inch, footer_text)
+    
+    # Divider lines
+    canvas.setStrokeColor(colors.darkgreen)
+    canvas.setLineWidth(0.5)
+    canvas.line(0.75*inch, doc.pagesize[1] - 0.6*inch, doc.pagesize[0] - 0.75*inch, doc.pagesize[1] - 0.6*inch)
+    canvas.line(0.75*inch, 0.6*inch, doc.pagesize[0] - 0.75*inch, 0.6*inch)
+    
+    canvas.restoreState()
+
+
+_styles = None
+
+
+def report_styles():
+    """Paragraph styles for the report, created once per process."""
+    global _styles
+    if _styles is None:
+        styles = getSampleStyleSheet()
+
+        # Custom styles definition
+        title_style = ParagraphStyle(
+             name='TitleStyle', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=32, leading=36, alignment=1, spaceAfter=12, textColor=colors.HexColor('#2E7D32') 
+        )
+        subtitle_style = ParagraphStyle(
+             name='SubtitleStyle', parent=styles['Heading2'], fontName='Helvetica-Oblique', fontSize=16, leading=20, alignment=1, spaceAfter=16, textColor=colors.HexColor('#4B5EAA') 
+        )
+        section_style = ParagraphStyle(
+             name='SectionStyle', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=14, leading=18, spaceBefore=16, spaceAfter=10, textColor=colors.HexColor('#2E7D32'), backColor=colors.HexColor('#E8F5E9') 
+        )
+        item_style = ParagraphStyle(
+             name='ItemStyle', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=14, leftIndent=20, spaceAfter=8, textColor=colors.black, firstLineIndent=-10
+        )
+        caption_style = ParagraphStyle(
+             name='CaptionStyle', parent=styles['Normal'], fontName='Helvetica-Oblique', fontSize=9, leading=12, alignment=1, spaceAfter=12, textColor=colors.grey
+        )
+
+        _styles = {
+            "title": title_style, "subtitle": subtitle_style, "section": section_style,
+            "item": item_style, "caption": caption_style,
+        }
+    return _styles
+
+
+def image_elements(image, caption_style):
+    """The plant's thumbnail (JPEG bytes) with its caption, or a placeholder caption."""
+    elements = []
+    if image:
+        img_reader = ImageReader(BytesIO(image))
+        img_width = 3*inch
+        aspect = img_reader.getSize()[1] / float(img_reader.getSize()[0])
+        img_height = img_width * aspect
+        if img_height > 3*inch:
+            img_height = 3*inch
+            img_width = img_height / aspect
+        picture = Image(BytesIO(image), width=img_width, height=img_height)
+        picture.hAlign = 'CENTER'
+        elements.append(picture)
+        elements.append(Paragraph("Plant Image", caption_style))
+    else:
+        elements.append(Paragraph("No image available", caption_style))
+    elements.append(Spacer(1, 0.3*inch))
+    return elements
+
+
+def plant_elements(plant, image=None):
+    """All flowables of one plant's report section; ``image`` is a prefetched thumbnail."""
+    styles = report_styles()
+    title_style, subtitle_style, section_style = styles["title"], styles["subtitle"], styles["section"]
+    item_style, caption_style = styles["item"], styles["caption"]
+    elements = []
+
+    # Title and Subtitle
+    elements.append(Paragraph(plant.get('common_name', 'Unknown Plant'), title_style))
+    elements.append(Paragraph(plant.get('botanical_name', 'Not available'), subtitle_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    elements.extend(image_elements(image, caption_style))
+
+    # Family
+    elements.append(Paragraph(f"<b>Family:</b> {plant.get('family', 'Not available')}", item_style))
+    elements.append(Spacer(1, 0.4*inch))
+
+    # Ratings Table
+    ratings_data = [["Rating", "Value"]]
+    ratings = [
+         ('Eligibility Rating', plant.get('eligibility_rating')),
+         ('Medical Rating', plant.get('medical_rating')),
+         ('Other Uses Rating', plant.get('other_uses_rating'))
+    ]
+    for label, value in ratings:
+        if value is not None:
+            try:
+                value = int(value) if isinstance(value, (int, float)) else 0
+                value = max(0, min(5, value))
+                stars = '★' * value + '☆' * (5 - value)
+                ratings_data.append([label, stars])
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid rating value for {label}: {value}")
+                ratings_data.append([label, "N/A"])
+    if len(ratings_data) > 1:
+        ratings_table = Table(ratings_data, colWidths=[3.5*inch, 2*inch])
+        ratings_table.setStyle(TableStyle([
+             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E7D32')), ('TEXTCOLOR', (0, 0), (-1, 0), colors.white), ('ALIGN', (0, 0), (-1, -1), 'CENTER'), ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'), ('FONTSIZE', (0, 0), (-1, 0), 12), ('BOTTOMPADDING', (0, 0), (-1, 0), 10), ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F1F8E9')), ('TEXTCOLOR', (0, 1), (-1, -1), colors.black), ('FONTSIZE', (0, 1), (-1, -1), 10), ('GRID', (0, 0), (-1, -1), 0.5, colors.grey), ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2E7D32')), ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'), ('TOPPADDING', (0, 1), (-1, -1), 8), ('BOTTOMPADDING', (0, 1), (-1, -1), 8), ('LEFTPADDING', (0, 0), (-1, -1), 10), ('RIGHTPADDING', (0, 0), (-1, -1), 10)
+        ]))
+        elements.append(ratings_table)
+    elements.append(Spacer(1, 0.4*inch))
+
+    # Sections
+    for section_name, items in {
+        "Summary": [
+            ("Overview", plant.get('summary', 'No summary available')), ("Genus", plant.get('genus')),
+            ("Flowering Season", plant.get('flowering_season')), ("Fruiting Season", plant.get('fruiting_season')),
+            ("Conservation Status", plant.get('conservation_status')), ("Featured", "Yes" if plant.get('featured') else "No")
+        ],
+        "Cultivation": [
+            ("Sun Exposure", plant.get('sun_exposure')), ("Soil Type", plant.get('soil_type')),
+            ("Water Needs", plant.get('water_needs')), ("Temperature Range", plant.get('temperature_range')),
+            ("Harvesting Time", plant.get('harvesting_time')), ("Propagation Methods", plant.get('propagation_methods')),
+            ("Care Tips", plant.get('care_tips')), ("Additional Details", plant.get('cultivation_details'))
+        ],
+        "Medicinal": [
+            ("Medicinal Uses", plant.get('medicinal_uses')), ("Medicinal Properties", plant.get('medicinal_properties')),
+            ("Edible Parts", plant.get('edible_parts')), ("Edible Uses", plant.get('edible_uses')),
+            ("Other Uses", plant.get('other_uses')), ("Usage Parts", plant.get('usage_parts')),
+            ("Medicinal Description", plant.get('medicinal_description')), ("Edible Description", plant.get('edible_parts_description'))
+        ],
+        "Botanical": [
+            ("Plant Type", plant.get('plant_type')), ("Leaf Type", plant.get('leaf_type')),
+            ("Habit", plant.get('habit')), ("USDA Hardiness Zone", plant.get('usda_hardiness_zone')),
+            ("Physical Characteristics", plant.get('physical_characteristics'))
+        ],
+        "Hazards": [
+            ("Known Hazards", plant.get('known_hazards', 'No known hazards recorded')), ("Storage", plant.get('storage')),
+            ("Weed Potential", plant.get('weed_potential'))
+        ],
+        "Distribution": [
+            ("Native Range", plant.get('native_range', 'No distribution information available')), ("Other Names", plant.get('other_names')),
+            ("Traditional Systems", plant.get('traditional_systems')), ("Search Tags", plant.get('search_tags')),
+            ("Slug", plant.get('slug'))
+        ]
+    }.items():
+        elements.append(Paragraph(section_name, section_style))
+        section_items = []
+        for label, value in items:
+            if value is not None:
+                text = f"<b>{label}:</b> {', '.join(str(v) for v in value) if isinstance(value, (list, tuple)) else str(value)}"
+                section_items.append(Paragraph(text, item_style))
+        if section_items:
+            elements.extend(section_items)
+        elements.append(Spacer(1, 0.25*inch))
+    return elements
+
+
+def new_document(buffer):
+    return SimpleDocTemplate(
+         buffer,
+         pagesize=letter,
+         rightMargin=0.75*inch,
+         leftMargin=0.75*inch,
+         topMargin=1*inch,
+         bottomMargin=1*inch
+    )
+
+
+def build_plant_pdf(plant, image=None):
+    """Renders the plant report and returns the PDF bytes. Does no network I/O."""
+    buffer = BytesIO()
+    doc = new_document(buffer)
+    doc.build(plant_elements(plant, image), onFirstPage=add_header_footer, onLaterPages=add_header_footer)
+    return buffer.getvalue()
+
+
+def build_combined_pdf(plants_with_images):
+    """One PDF with a section per ``(plant, image)``, each starting on a new page."""
+    elements = []
+    for plant, image in plants_with_images:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(plant_elements(plant, image))
+    buffer = BytesIO()
+    new_document(buffer).build(elements, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
+    return buffer.getvalue()
+
+
+def report_filename(name):
+    safe = re.sub(r"[^\w\- ]+", "", str(name)).strip() or "plant"
+    return f"{safe}_Plant_Report.pdf"
+
+
+# ---------- Rendering service ----------
+def report_key(content_hash):
+    """Cache key of a rendered report: the plant's content hash plus the layout version."""
+    return hashlib.sha1(f"{content_hash}:v{REPORT_LAYOUT_VERSION}".encode()).hexdigest()
+
+
+class PlantReportRenderer:
+    """Serves rendered plant reports from a bounded disk cache and renders misses in a process pool.
+
+    ReportLab layout is CPU-bound and holds the GIL, so rendering on the request thread
+    stalls every other request in the worker. Misses go to a small pool of render
+    processes instead, and concurrent misses for the same plant share one render.
+    """
+
+    def __init__(self, cache_dir=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES, workers=PDF_RENDER_WORKERS):
+        self.cache = DiskLRUCache(cache_dir, max_bytes, suffix=".pdf")
+        self.workers = workers
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._in_flight = SingleFlight()
+        self.renders = 0
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                context = multiprocessing.get_context(PDF_RENDER_START_METHOD)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _reset_pool(self, broken):
+        # Only the first thread to see the broken pool drops it; later ones keep its replacement
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+
+    def _run(self, fn, *args):
+        self.renders += 1
+        if self.workers <= 0:
+            return fn(*args)
+        pool = self._executor()
+        try:
+            return pool.submit(fn, *args).result(timeout=PDF_RENDER_TIMEOUT)
+        except BrokenProcessPool:
+            print("⚠️ PDF render pool died; rendering inline and restarting it.", file=sys.stderr)
+            self._reset_pool(pool)
+            return fn(*args)
+
+    def _render(self, plant, image):
+        return self._run(build_plant_pdf, plant, image)
+
+    def _render_and_store(self, key, plant):
+        pdf = self.cache.get(key)  # another worker may have rendered it meanwhile
+        if pdf is None:
+            # Images are fetched here (I/O, threads) so render processes only do layout
+            image, settled = plant_images.thumbnail(plant_images.candidates(plant))
+            pdf = self._render(plant, image)
+            if settled:
+                self.cache.set(key, pdf)  # otherwise the next request may find the image downloaded
+        return pdf
+
+    def get(self, plant, content_hash):
+        """PDF bytes for ``plant``, whose JSON hashes to ``content_hash``."""
+        key = report_key(content_hash)
+        pdf = self.cache.get(key)
+        if pdf is None:
+            pdf = self._in_flight.do(key, self._render_and_store, key, plant)
+        return pdf
+
+    def iter_zip(self, documents, missing=(), render_ahead=BATCH_RENDER_AHEAD):
+        """Yields a ZIP archive of the reports of ``documents`` chunk by chunk.
+
+        Up to ``render_ahead`` reports are fetched or rendered concurrently while earlier
+        ones are written out, so memory stays bounded by that window, not by the batch.
+        Requested plants that were not found are listed in MISSING_PLANTS_FILE.
+        """
+        stream = _ChunkStream()
+        names = set()
+        with ThreadPoolExecutor(max_workers=max(1, render_ahead)) as pool, \
+                zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+            def submit(document):
+                return document, pool.submit(self.get, document.plant, document.etag)
+
+            pending = iter(documents)
+            window = deque(submit(document) for document in islice(pending, max(1, render_ahead)))
+            while window:
+                document, future = window.popleft()
+                following = next(pending, None)
+                if following is not None:
+                    window.append(submit(following))
+                filename = report_filename(document.plant.get("common_name"))
+                while filename in names:
+                    filename = filename.replace(".pdf", "_.pdf")
+                names.add(filename)
+                archive.writestr(filename, future.result())  # PDFs are already compressed
+                yield stream.drain()
+            if missing:
+                archive.writestr(MISSING_PLANTS_FILE, "".join(" ".join(name.split()) + "\n" for name in missing),
+                                 compress_type=zipfile.ZIP_DEFLATED)
+        yield stream.drain()
+
+    def combined(self, plants):
+        """One combined PDF for up to COMBINED_PDF_MAX_PLANTS plants (images fetched concurrently)."""
+        if len(plants) > COMBINED_PDF_MAX_PLANTS:
+            raise ValueError(f"A combined PDF is limited to {COMBINED_PDF_MAX_PLANTS} plants")
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(plants)))) as pool:
+            images = list(pool.map(lambda p: plant_images.thumbnail(plant_images.candidates(p))[0], plants))
+        return self._run(build_combined_pdf, list(zip(plants, images)))
+
+    def stats(self):
+        return {**self.cache.stats(), "workers": self.workers, "renders": self.renders}
+
+
+class _ChunkStream:
+    """Write-only, unseekable sink for zipfile; ``drain`` hands back what was written so far."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+plant_reports = PlantReportRenderer()
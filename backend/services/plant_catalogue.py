@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from services.http_client import http_client
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+PLANTS_API_URL = os.getenv("PLANTS_API_URL", "https://plant-api-buj0.onrender.com/api/plants")
+PLANTS_API_KEY = os.getenv("PLANTS_API_KEY", "mysecretkey123")
+CATALOGUE_TTL = float(os.getenv("PLANT_CATALOGUE_TTL", "900"))           # seconds before a background refresh
+CATALOGUE_RETRY_AFTER = float(os.getenv("PLANT_CATALOGUE_RETRY_AFTER", "60"))  # back-off after a failed refresh
+CATALOGUE_TIMEOUT = float(os.getenv("PLANT_CATALOGUE_TIMEOUT", "10"))
+
+
+def fetch_plants_from_api():
+    """Fetches the full plant list from the upstream plant API."""
+    # Runs in the background after the first load, so it can afford to retry
+    response = http_client.get(PLANTS_API_URL, headers={"x-api-key": PLANTS_API_KEY}, timeout=CATALOGUE_TIMEOUT,
+                               retries=2)
+    response.raise_for_status()
+    return response.json()
+
+
+def normalize_key(value):
+    return str(value).strip().lower() if value is not None else ""
+
+
+class CatalogueSnapshot:
+    """One immutable load of the plant list plus its lookup tables and derived indexes."""
+
+    def __init__(self, plants, version):
+        self.plants = plants
+        self.version = version
+        self.loaded_at = time.time()
+        self.by_name = {}
+        self.by_slug = {}
+        self.by_id = {}
+        for plant in plants:
+            for field in ("common_name", "botanical_name"):
+                key = normalize_key(plant.get(field))
+                if key:
+                    self.by_name.setdefault(key, plant)
+            slug = normalize_key(plant.get("slug"))
+            if slug:
+                self.by_slug.setdefault(slug, plant)
+            plant_id = plant.get("_id", plant.get("id"))
+            if plant_id is not None:
+                self.by_id.setdefault(str(plant_id), plant)
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def derive(self, name, builder):
+        """Builds (once per snapshot) and returns a structure computed from the plant list."""
+        value = self._derived.get(name)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = builder(self.plants)
+                    self._derived[name] = value
+        return value
+
+
+class PlantCatalogue:
+    """Process-wide plant list shared by every blueprint.
+
+    The first call loads synchronously. After ``ttl`` seconds the next reader triggers a
+    refresh in a background thread and keeps getting the current data meanwhile; if the
+    upstream API is down, the stale list keeps being served.
+    """
+
+    def __init__(self, fetch=fetch_plants_from_api, ttl=CATALOGUE_TTL, retry_after=CATALOGUE_RETRY_AFTER,
+                 label="Plant catalogue"):
+        self._fetch = fetch
+        self.label = label
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._next_refresh_at = 0.0
+        self._version = 0
+        self.last_error = None
+        self.last_error_at = None
+        self._index_builders = {}
+
+    def snapshot(self):
+        """Returns the current CatalogueSnapshot, loading it on first use (raises if that fails)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._refresh()
+                    if self._snapshot is None:
+                        raise RuntimeError(f"{self.label} unavailable: {self.last_error}")
+                snapshot = self._snapshot
+        elif time.time() >= self._next_refresh_at:
+            self._refresh_in_background()
+        return snapshot
+
+    def register_index(self, name, builder):
+        """Registers ``builder(plants)``; its result is rebuilt for every new snapshot before it goes live."""
+        self._index_builders[name] = builder
+
+    def index(self, name):
+        """The registered index ``name`` for the current snapshot."""
+        return self.snapshot().derive(name, self._index_builders[name])
+
+    def get_all(self):
+        return self.snapshot().plants
+
+    def find_by_name(self, name):
+        return self.snapshot().by_name.get(normalize_key(name))
+
+    def find_by_slug(self, slug):
+        return self.snapshot().by_slug.get(normalize_key(slug))
+
+    def find_by_id(self, plant_id):
+        return self.snapshot().by_id.get(str(plant_id))
+
+    def _refresh(self):
+        try:
+            started = time.perf_counter()
+            plants = self._fetch()
+            snapshot = CatalogueSnapshot(plants, self._version + 1)
+            # Build derived indexes here (background thread) so readers never pay for them
+            for name, builder in list(self._index_builders.items()):
+                snapshot.derive(name, builder)
+            self._version += 1
+            self._snapshot = snapshot
+            self._next_refresh_at = time.time() + self.ttl
+            logger.info(f"✅ {self.label} v{self._version} loaded: {len(plants)} entries in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            self.last_error, self.last_error_at = str(e), time.time()
+            self._next_refresh_at = time.time() + self.retry_after
+            if self._snapshot is not None:
+                logger.warning(f"⚠️ {self.label} refresh failed, serving stale data: {e}")
+            else:
+                logger.error(f"❌ {self.label} load failed: {e}")
+
+    def _refresh_in_background(self):
+        with self._load_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name=f"{self.label.lower().replace(' ', '-')}-refresh", daemon=True).start()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": snapshot.version if snapshot else None,
+            "plants": len(snapshot.plants) if snapshot else 0,
+            "age_seconds": round(time.time() - snapshot.loaded_at, 1) if snapshot else None,
+            "ttl": self.ttl,
+            "last_error": self.last_error,
+        }
+
+
+plant_catalogue = PlantCatalogue()
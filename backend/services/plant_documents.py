@@ -0,0 +1,119 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from dotenv import load_dotenv
+
+from services.http_client import http_client
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+PLANT_API_URL = os.getenv("PLANT_API_URL", "https://plant-api-buj0.onrender.com/api/plant")
+PLANTS_API_KEY = os.getenv("PLANTS_API_KEY", "mysecretkey123")
+PLANT_CACHE_SIZE = int(os.getenv("PLANT_CACHE_SIZE", "1024"))
+PLANT_CACHE_TTL = float(os.getenv("PLANT_CACHE_TTL", "600"))                  # seconds a found plant is reused
+PLANT_NOT_FOUND_TTL = float(os.getenv("PLANT_NOT_FOUND_TTL", "60"))           # seconds a 404 is remembered
+PLANT_FETCH_TIMEOUT = float(os.getenv("PLANT_FETCH_TIMEOUT", "15"))
+PLANT_FETCH_CONCURRENCY = int(os.getenv("PLANT_FETCH_CONCURRENCY", "8"))       # parallel lookups in get_many
+
+_NOT_FOUND = object()
+
+
+class PlantDocument:
+    """One plant as returned by the plant API, with the validators used for conditional GETs."""
+
+    def __init__(self, plant, fetched_at=None):
+        self.plant = plant
+        body = json.dumps(plant, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        self.etag = hashlib.sha1(body).hexdigest()
+        # HTTP dates have one-second resolution
+        self.last_modified = (fetched_at or datetime.now(timezone.utc)).replace(microsecond=0)
+
+
+def fetch_plant_from_api(plant_name):
+    """Fetches a single plant by name from the remote API. Returns None on 404."""
+    try:
+        response = http_client.get(
+            PLANT_API_URL,
+            params={"name": plant_name},
+            headers={"x-api-key": PLANTS_API_KEY},
+            timeout=PLANT_FETCH_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 404:
+            return None
+        logger.error(f"HTTP Error fetching plant data: {e.response.status_code}")
+        raise
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Network/Request Error fetching plant data: {str(e)}", exc_info=True)
+        raise
+
+
+class PlantDocumentCache:
+    """Bounded TTL cache of single-plant documents keyed by normalized name.
+
+    Misses (404s) are cached too, for a shorter time, so repeated lookups of a
+    name that does not exist don't reach the upstream API either. Errors are not cached.
+    Concurrent misses for the same name share one upstream request.
+    """
+
+    def __init__(self, fetch=fetch_plant_from_api, maxsize=PLANT_CACHE_SIZE, ttl=PLANT_CACHE_TTL,
+                 not_found_ttl=PLANT_NOT_FOUND_TTL):
+        self._fetch = fetch
+        self.not_found_ttl = not_found_ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight = SingleFlight()
+
+    @staticmethod
+    def _key(plant_name):
+        return " ".join(str(plant_name).lower().split())
+
+    def get(self, plant_name):
+        """Returns the PlantDocument for ``plant_name``, or None if the API doesn't know it."""
+        key = self._key(plant_name)
+        document = self._cache.get(key)
+        if document is None:
+            document = self._in_flight.do(key, self._load, key, plant_name)
+        return None if document is _NOT_FOUND else document
+
+    def get_many(self, plant_names, concurrency=PLANT_FETCH_CONCURRENCY):
+        """Looks up several plants concurrently. Returns ``[(name, PlantDocument or None or Exception)]`` in order."""
+        def lookup(name):
+            try:
+                return self.get(name)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(plant_names)))) as pool:
+            return list(zip(plant_names, pool.map(lookup, plant_names)))
+
+    def _load(self, key, plant_name):
+        plant = self._fetch(plant_name)
+        if not plant:
+            self._cache.set(key, _NOT_FOUND, ttl=self.not_found_ttl)
+            return _NOT_FOUND
+        document = PlantDocument(plant)
+        self._cache.set(key, document)
+        return document
+
+    def invalidate(self, plant_name=None):
+        if plant_name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(self._key(plant_name))
+
+    def stats(self):
+        return {**self._cache.stats(), "not_found_ttl": self.not_found_ttl, "upstream": self._in_flight.stats()}
+
+
+plant_documents = PlantDocumentCache()
@@ -0,0 +1,173 @@
+import base64
+import os
+
+from bson import json_util
+from dotenv import load_dotenv
+
+from services.product_router import product_router
+
+load_dotenv()
+
+# ===== CONFIG =====
+PRODUCTS_MAX_PAGE = int(os.getenv("PRODUCTS_MAX_PAGE", "200"))
+PRODUCTS_BATCH_SIZE = int(os.getenv("PRODUCTS_BATCH_SIZE", "500"))  # documents per getMore while streaming
+
+PRODUCT_PROJECTION = {
+    '_id': 1,
+    'name': 1,
+    'description': 1,
+    'price': 1,
+    'category': 1,
+    'image': 1,
+    'stock': 1,
+    'filters': 1,
+    'careLevel': 1,
+    'lightRequirements': 1,
+    'wateringNeeds': 1,
+    'germinationTime': 1,
+    'bestSeason': 1,
+    'ingredients': 1,
+    'benefits': 1,
+    'material': 1,
+    'size': 1,
+    'dosage': 1,
+    'rating': 1
+}
+
+# sort name -> field; "-name" sorts descending. Products without the field sort as null
+# (before every value ascending, after every value descending). Each branch of the
+# listing sorts on the raw field, so every product collection should have these indexes:
+#   {_id: 1} (default), {name: 1, _id: 1}, {price: 1, _id: 1}, {rating: 1, _id: 1}
+# (one index serves both directions). A sort field must hold a single BSON type per
+# collection (numbers or strings) for keyset paging to be exact.
+SORT_FIELDS = {
+    "id": "_id",
+    "name": "name",
+    "price": "price",
+    "rating": "rating",
+}
+
+
+class ListingError(ValueError):
+    """Invalid listing parameters (reported to the client as a 400)."""
+
+
+def parse_sort(sort):
+    descending = sort.startswith("-")
+    name = sort.lstrip("-") or "id"
+    if name not in SORT_FIELDS:
+        raise ListingError(f"Unknown sort '{sort}'. Use one of: {', '.join(SORT_FIELDS)} (prefix '-' for descending)")
+    return name, descending
+
+
+def encode_cursor(sort, product):
+    """Opaque keyset cursor pointing just after ``product`` in ``sort`` order."""
+    payload = json_util.dumps({"sort": sort, "key": product["_sort"], "id": product["_id"]})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key, product_id = payload["key"], payload["id"]
+    except Exception:
+        raise ListingError("Invalid cursor")
+    if payload.get("sort") != sort:
+        raise ListingError("Cursor was issued for a different sort order")
+    return key, product_id
+
+
+def keyset_match(field, descending, key, product_id):
+    """Filter on the raw ``field`` for the products after ``(key, product_id)``.
+
+    MongoDB comparisons only match values of the key's type, so null (missing) keys,
+    which sort before every value, are handled explicitly.
+    """
+    op = "$lt" if descending else "$gt"
+    if field == "_id":
+        return {"_id": {op: product_id}}
+    tie = {field: key, "_id": {op: product_id}}
+    if key is None:
+        # Ascending, every value follows the nulls; descending, nothing does
+        return {"$or": [{field: {"$ne": None}}, tie]} if not descending else tie
+    after = [{field: {op: key}}, tie]
+    if descending:
+        after.append({field: None})
+    return {"$or": after}
+
+
+def build_pipeline(category=None, min_price=None, max_price=None, sort="id", cursor=None, limit=None):
+    """``(collection, pipeline)`` listing the product collections as one sorted stream.
+
+    Every collection runs the same branch: filter (price and keyset position), sort on
+    the raw field and ``_id`` (served by the ``(field, _id)`` index) and, for a page,
+    stop after ``limit`` products. The branches are joined with ``$unionWith`` and the
+    final ``$sort``/``$limit`` merge at most one page per collection.
+    """
+    sort_name, descending = parse_sort(sort)
+    field = SORT_FIELDS[sort_name]
+
+    collections = product_router.collections()
+    if category:
+        if category not in collections:
+            raise ListingError(f"Unknown category '{category}'. Use one of: {', '.join(collections)}")
+        collections = {category: collections[category]}
+    collections = [c for c in collections.values() if c is not None]
+    if not collections:
+        raise RuntimeError("Product collections are unavailable")
+
+    match = {}
+    if min_price is not None or max_price is not None:
+        match["price"] = {}
+        if min_price is not None:
+            match["price"]["$gte"] = min_price
+        if max_price is not None:
+            match["price"]["$lte"] = max_price
+    if cursor:
+        key, product_id = decode_cursor(cursor, sort)
+        match = {"$and": [match, keyset_match(field, descending, key, product_id)]} if match \
+            else keyset_match(field, descending, key, product_id)
+
+    direction = -1 if descending else 1
+    order = {"_id": direction} if field == "_id" else {field: direction, "_id": direction}
+    branch = [{"$match": match}] if match else []
+    branch.append({"$sort": order})
+    if limit is not None:
+        branch.append({"$limit": limit})
+    branch.append({"$project": {**PRODUCT_PROJECTION, "_sort": {"$ifNull": [f"${field}", None]}}})
+    if len(collections) == 1:
+        return collections[0], branch
+
+    pipeline = list(branch)
+    for collection in collections[1:]:
+        pipeline.append({"$unionWith": {"coll": collection.name, "pipeline": branch}})
+    pipeline.append({"$sort": {"_sort": direction, "_id": direction}})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    return collections[0], pipeline
+
+
+def list_products(category=None, min_price=None, max_price=None, sort="id", cursor=None, limit=None):
+    """Returns ``(products, next_cursor)``.
+
+    Without ``limit`` the products come from a live MongoDB cursor (fetched in batches,
+    never held in memory at once) and ``next_cursor`` is None; this mode is best-effort,
+    as an error while streaming can only end the list early. With ``limit`` one page
+    (at most PRODUCTS_MAX_PAGE) is read, plus one product to tell whether there is more.
+    Products keep their ``_sort`` key; callers drop it when serializing.
+    """
+    if limit is not None and not 1 <= limit <= PRODUCTS_MAX_PAGE:
+        raise ListingError(f"limit must be between 1 and {PRODUCTS_MAX_PAGE}")
+    collection, pipeline = build_pipeline(category, min_price, max_price, sort, cursor,
+                                          None if limit is None else limit + 1)
+    results = collection.aggregate(pipeline, allowDiskUse=True, batchSize=PRODUCTS_BATCH_SIZE)
+    if limit is None:
+        return results, None
+
+    with results:
+        page = list(results)
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(sort, page[-1])
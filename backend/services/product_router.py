@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Hashable
+
+from dotenv import load_dotenv
+
+from services.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# ===== CONFIG =====
+PRODUCT_ROUTER_TTL = float(os.getenv("PRODUCT_ROUTER_TTL", "300"))             # seconds before a background reload
+PRODUCT_ROUTER_RETRY_AFTER = float(os.getenv("PRODUCT_ROUTER_RETRY_AFTER", "60"))
+PRODUCT_ROUTER_MISS_TTL = float(os.getenv("PRODUCT_ROUTER_MISS_TTL", "5"))     # unknown ids are not re-probed for this long
+
+
+def product_collections():
+    """``{category: collection}`` for the five product collections, in probing order."""
+    from db import (
+        plants_collection,
+        seeds_collection,
+        skincare_collection,
+        accessories_collection,
+        medicines_collection,
+    )
+    return {
+        'plant': plants_collection,
+        'seed': seeds_collection,
+        'skincare': skincare_collection,
+        'accessory': accessories_collection,
+        'medicine': medicines_collection
+    }
+
+
+class ProductRouter:
+    """Maps a product id to the category (and so the collection) that holds it.
+
+    The map is loaded from the ``_id`` index of every product collection in a
+    background thread. Every ``ttl`` seconds the collection counts are compared and
+    the ``_id`` scan is repeated only when they changed. Until the map is loaded,
+    and for ids it does not know (products are added outside this app), lookups fall
+    back to probing the collections; what a probe finds is recorded, and ids found
+    nowhere are remembered for ``miss_ttl`` seconds so a bad id does not cost five
+    round-trips on every request while a new product shows up within seconds.
+    """
+
+    def __init__(self, collections=product_collections, ttl=PRODUCT_ROUTER_TTL,
+                 retry_after=PRODUCT_ROUTER_RETRY_AFTER, miss_ttl=PRODUCT_ROUTER_MISS_TTL):
+        self._collections_factory = collections
+        self._collections = None
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._routes = None            # product id -> category
+        self._counts = None            # category -> document count when the map was loaded
+        self._misses = TTLCache(maxsize=4096, ttl=miss_ttl)
+        self._lock = threading.Lock()
+        self._loading = False
+        self._next_load_at = 0.0
+        self.loaded_at = None
+        self.last_error = None
+        self.routed = 0
+        self.probed = 0
+
+    def collections(self):
+        if self._collections is None:
+            self._collections = self._collections_factory()
+        return self._collections
+
+    def collection_for(self, category):
+        return self.collections().get(category)
+
+    # ----- routing table -----
+
+    def _load(self):
+        try:
+            started = time.perf_counter()
+            collections = {category: c for category, c in self.collections().items() if c is not None}
+            counts = {category: collection.estimated_document_count() for category, collection in collections.items()}
+            if self._routes is not None and counts == self._counts:
+                # Nothing added or removed in bulk; lookups correct single stale entries themselves
+                self._next_load_at = time.time() + self.ttl
+                return
+            routes = {}
+            for category, collection in collections.items():
+                for doc in collection.find({}, {"_id": 1}):
+                    routes.setdefault(doc["_id"], category)
+            self._routes = routes
+            self._counts = counts
+            self._misses.clear()
+            self.loaded_at = time.time()
+            self._next_load_at = self.loaded_at + self.ttl
+            logger.info(f"✅ Product router loaded: {len(routes)} products in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            self.last_error = str(e)
+            self._next_load_at = time.time() + self.retry_after
+            logger.warning(f"⚠️ Product router load failed, probing collections instead: {e}")
+
+    def _load_in_background(self):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+
+        def run():
+            try:
+                self._load()
+            finally:
+                self._loading = False
+
+        threading.Thread(target=run, name="product-router-load", daemon=True).start()
+
+    def _table(self):
+        if time.time() >= self._next_load_at:
+            self._load_in_background()
+        return self._routes
+
+    def record(self, product_id, category):
+        """Notes where a product lives; call after inserting a product or on discovering one."""
+        routes = self._routes
+        if routes is not None:
+            routes[product_id] = category
+        self._misses.pop(product_id)
+
+    def forget(self, product_id):
+        """Drops a product from the map; call after deleting it."""
+        routes = self._routes
+        if routes is not None:
+            routes.pop(product_id, None)
+
+    # ----- lookups -----
+
+    def find_product(self, product_id, projection=None):
+        """Returns ``(product, collection)`` with one targeted query, or ``(None, None)``."""
+        if not isinstance(product_id, Hashable):
+            return None, None
+        routes = self._table()
+        category = routes.get(product_id) if routes is not None else None
+        if category is not None:
+            collection = self.collection_for(category)
+            if collection is not None:
+                self.routed += 1
+                product = collection.find_one({"_id": product_id}, projection)
+                if product:
+                    return product, collection
+            # Deleted or moved since the map was loaded
+            self.forget(product_id)
+        product, category = self._probe(product_id, projection)
+        return product, (self.collection_for(category) if category else None)
+
+    def _probe(self, product_id, projection):
+        if self._misses.get(product_id):
+            return None, None
+        self.probed += 1
+        for category, collection in self.collections().items():
+            if collection is None:
+                continue
+            product = collection.find_one({"_id": product_id}, projection)
+            if product:
+                self.record(product_id, category)
+                return product, category
+        self._misses.set(product_id, True)
+        return None, None
+
+    def find_many(self, product_ids, projection=None):
+        """Products for ``product_ids`` in the given order, with one ``$in`` query per category.
+
+        Ids the map does not know are looked up with one ``$in`` per collection.
+        """
+        routes = self._table() or {}
+        by_category, unknown = defaultdict(list), []
+        product_ids = [product_id for product_id in product_ids if isinstance(product_id, Hashable)]
+        for product_id in dict.fromkeys(product_ids):
+            category = routes.get(product_id)
+            if category is not None:
+                by_category[category].append(product_id)
+            elif not self._misses.get(product_id):
+                unknown.append(product_id)
+
+        found = {}
+        for category, ids in by_category.items():
+            collection = self.collection_for(category)
+            if collection is None:
+                continue
+            self.routed += 1
+            for product in collection.find({"_id": {"$in": ids}}, projection):
+                found[product["_id"]] = product
+        stale = [product_id for ids in by_category.values() for product_id in ids if product_id not in found]
+        for product_id in stale:
+            self.forget(product_id)
+
+        unknown += stale
+        if unknown:
+            self.probed += 1
+            for category, collection in self.collections().items():
+                if collection is None or not unknown:
+                    continue
+                for product in collection.find({"_id": {"$in": unknown}}, projection):
+                    found[product["_id"]] = product
+                    self.record(product["_id"], category)
+                unknown = [product_id for product_id in unknown if product_id not in found]
+            for product_id in unknown:
+                self._misses.set(product_id, True)
+
+        return [found[product_id] for product_id in dict.fromkeys(product_ids) if product_id in found]
+
+    def stats(self):
+        routes = self._routes
+        return {
+            "loaded": routes is not None,
+            "products": len(routes) if routes is not None else 0,
+            "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+            "ttl": self.ttl,
+            "routed_queries": self.routed,
+            "probes": self.probed,
+            "known_missing": len(self._misses),
+            "last_error": self.last_error,
+        }
+
+
+product_router = ProductRouter()
@@ -0,0 +1,168 @@
+import math
+import os
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.autocomplete import normalize_name
+from services.plant_catalogue import PlantCatalogue
+from services.product_router import product_router
+
+load_dotenv()
+
+# ===== CONFIG =====
+PRODUCT_SEARCH_TTL = float(os.getenv("PRODUCT_SEARCH_TTL", "300"))   # seconds before the index is rebuilt
+PRODUCT_SEARCH_MAX_LIMIT = int(os.getenv("PRODUCT_SEARCH_MAX_LIMIT", "50"))
+
+TOKEN_RE = re.compile(r"\b\w+\b")
+# A token's weight in a product is the sum of the weights of the fields it appears in
+FIELD_WEIGHTS = (("name", 3.0), ("category", 1.5), ("ingredients", 1.0), ("benefits", 1.0))
+# Vocabulary terms a type-ahead prefix may expand to (most frequent first)
+MAX_PREFIX_TERMS = 64
+PREFIX_PENALTY = 0.8           # a completed word counts a little less than a typed one
+NAME_PREFIX_BOOST = 2.0        # the whole query starts the product name
+MAX_NAME_PREFIX_MATCHES = 500
+
+SEARCH_PROJECTION = {"_id": 1, "name": 1, "category": 1, "image": 1, "ingredients": 1, "benefits": 1}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def field_text(value):
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value if v)
+    return str(value) if value else ""
+
+
+def search_payload(product):
+    return {
+        "_id": str(product.get("_id")),
+        "name": product.get("name", ""),
+        "category": product.get("category", ""),
+        "image": product.get("image", ""),
+    }
+
+
+class ProductSearchIndex:
+    """In-process inverted index over product name, category, ingredients and benefits.
+
+    Each product's tokens carry a field weight (name matches count most), scored
+    with idf so rare words decide the ranking. Products matching more query words
+    always rank first. The last query word is also completed against the sorted
+    vocabulary for type-ahead, and products whose name starts with the whole query
+    get a boost. Only the ``limit`` best positions are selected (argpartition) and
+    turned into payloads.
+    """
+
+    def __init__(self, products):
+        self._payloads = [search_payload(product) for product in products]
+        size = len(products)
+        weights = defaultdict(lambda: defaultdict(float))
+        for position, product in enumerate(products):
+            for field, weight in FIELD_WEIGHTS:
+                for token in set(tokenize(field_text(product.get(field)))):
+                    weights[token][position] += weight
+
+        self.vocab = sorted(weights)
+        self.postings = {}
+        for token in self.vocab:
+            doc_weights = weights[token]
+            idf = math.log(1 + size / len(doc_weights))
+            positions = np.fromiter(doc_weights.keys(), dtype=np.int32, count=len(doc_weights))
+            scores = np.fromiter(doc_weights.values(), dtype=np.float32, count=len(doc_weights)) * idf
+            self.postings[token] = (positions, scores)
+
+        names = sorted((normalize_name(product.get("name", "")), position) for position, product in enumerate(products))
+        self._names = [name for name, _ in names]
+        self._name_positions = [position for _, position in names]
+        self.size = size
+
+    def _prefix_postings(self, prefix):
+        """Postings of vocabulary terms starting with ``prefix`` (excluding ``prefix`` itself)."""
+        i = bisect_left(self.vocab, prefix)
+        terms = []
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            if self.vocab[i] != prefix:
+                terms.append(self.vocab[i])
+            i += 1
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = sorted(terms, key=lambda t: len(self.postings[t][0]), reverse=True)[:MAX_PREFIX_TERMS]
+        return [self.postings[t] for t in terms]
+
+    def _term_scores(self, token, complete_prefix):
+        """``(positions, scores)`` for one query word; a position appears at most once."""
+        hits = [self.postings[token]] if token in self.postings else []
+        if complete_prefix:
+            hits += [(p, s * PREFIX_PENALTY) for p, s in self._prefix_postings(token)]
+        if not hits:
+            return None
+        if len(hits) == 1:
+            return hits[0]
+        positions = np.concatenate([p for p, _ in hits])
+        scores = np.concatenate([s for _, s in hits])
+        # Keep the best-scoring expansion per product
+        order = np.lexsort((-scores, positions))
+        positions, scores = positions[order], scores[order]
+        first = np.ones(len(positions), dtype=bool)
+        first[1:] = positions[1:] != positions[:-1]
+        return positions[first], scores[first]
+
+    def search(self, query, limit=10, prefix=True):
+        """Best ``limit`` products for ``query``; with ``prefix`` the last word may be incomplete."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit <= 0:
+            return []
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        matched = np.zeros(self.size, dtype=np.int16)
+        for i, token in enumerate(tokens):
+            term = self._term_scores(token, prefix and i == len(tokens) - 1)
+            if term is None:
+                continue
+            positions, term_scores = term
+            scores[positions] += term_scores
+            matched[positions] += 1
+
+        name = normalize_name(query)
+        i = bisect_left(self._names, name)
+        end = min(len(self._names), i + MAX_NAME_PREFIX_MATCHES)
+        while i < end and self._names[i].startswith(name):
+            position = self._name_positions[i]
+            if matched[position]:
+                scores[position] += NAME_PREFIX_BOOST
+            i += 1
+
+        candidates = np.flatnonzero(matched)
+        if not len(candidates):
+            return []
+        # Words matched first, score second
+        rank = matched[candidates].astype(np.float64) * (float(scores.max()) + 1) + scores[candidates]
+        if len(candidates) > limit:
+            top = np.argpartition(-rank, limit - 1)[:limit]
+            candidates, rank = candidates[top], rank[top]
+        order = np.argsort(-rank, kind="stable")
+        return [self._payloads[position] for position in candidates[order]]
+
+
+def fetch_products_for_search():
+    """The searchable fields of every product, from all product collections."""
+    products = []
+    for collection in product_router.collections().values():
+        if collection is None:
+            continue
+        products.extend(collection.find({}, SEARCH_PROJECTION))
+    return products
+
+
+product_catalogue = PlantCatalogue(fetch=fetch_products_for_search, ttl=PRODUCT_SEARCH_TTL, label="Product catalogue")
+product_catalogue.register_index("search", ProductSearchIndex)
+
+
+def search_products(query, limit=10):
+    limit = max(1, min(int(limit), PRODUCT_SEARCH_MAX_LIMIT))
+    return product_catalogue.index("search").search(query, limit=limit)
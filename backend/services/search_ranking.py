@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """Returns an L2-normalized float32 copy of ``matrix``; all-zero rows stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def semantic_scores(query_vec, normalized_embeddings):
+    """Cosine similarity of one query vector against every (pre-normalized) plant embedding."""
+    norm = np.linalg.norm(query_vec)
+    if norm == 0:
+        return np.zeros(normalized_embeddings.shape[0], dtype=np.float32)
+    return normalized_embeddings @ (np.asarray(query_vec, dtype=np.float32) / norm)
+
+
+def hybrid_scores(semantic, boost_positions, boost_values, boost_weight):
+    """Adds the weighted keyword boost onto the semantic scores (in place) and returns them."""
+    if len(boost_positions):
+        semantic[boost_positions] += boost_weight * boost_values
+    return semantic
+
+
+def top_k_indices(scores, k):
+    """Indices of the ``k`` highest scores, best first, without sorting the whole array."""
+    k = max(0, min(int(k), len(scores)))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def candidate_hybrid_scores(query_vec, normalized_embeddings, candidates, boost_positions, boost_values, boost_weight):
+    """Hybrid scores for a sorted subset of rows that contains every boosted position."""
+    scores = semantic_scores(query_vec, normalized_embeddings[candidates])
+    if len(boost_positions):
+        scores[np.searchsorted(candidates, boost_positions)] += boost_weight * boost_values
+    return scores
@@ -0,0 +1,174 @@
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+from services.keyword_index import KeywordIndex
+from services.search_ranking import normalize_rows
+from services.search_store import STORE_DIR, current_version, open_store
+
+load_dotenv()
+
+# ===== CONFIG =====
+# Memory-mapped search store written by generate_embeddings.py (preferred over the .pkl)
+SEARCH_STORE_DIR = STORE_DIR
+# Legacy cache, used only while no search store has been generated
+CACHED_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "cached_search_data.pkl"
+)
+# Approximate nearest-neighbour search kicks in once the corpus is this large
+ANN_MIN_CORPUS = int(os.getenv("ANN_MIN_CORPUS", "20000"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+# How often each worker checks the disk for a newly published index (seconds, 0 disables)
+SEARCH_RELOAD_INTERVAL = float(os.getenv("SEARCH_RELOAD_INTERVAL", "30"))
+
+
+class SearchIndex:
+    """Immutable snapshot of everything a search needs. Swapped as a whole on reload."""
+
+    def __init__(self, version, source, plants, embeddings, keyword_index, ann_index, load_seconds, disk_version=None):
+        self.version = version
+        # What disk_version() said when this was loaded; differs from ``version`` when the
+        # store could not be opened and the pickle was served instead
+        self.disk_version = disk_version if disk_version is not None else version
+        self.source = source
+        self.plants = plants
+        self.embeddings = embeddings
+        self.keyword_index = keyword_index
+        self.ann_index = ann_index
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "disk_version": self.disk_version,
+            "plants": len(self.plants),
+            "ann_enabled": self.ann_index is not None,
+            "loaded_at": self.loaded_at.isoformat(),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+# ===== GLOBAL STATE =====
+# Readers take one reference per request and never lock; reloads replace it in a single assignment.
+_current_index = None
+_reload_lock = threading.Lock()  # serializes loads only
+_reloader_started = False
+
+
+def get_search_index():
+    """The currently served SearchIndex, or None if nothing could be loaded."""
+    return _current_index
+
+
+def disk_version():
+    """Version the disk would serve now: the store's CURRENT or the legacy pickle's mtime."""
+    version = current_version(SEARCH_STORE_DIR)
+    if version is not None:
+        return version
+    try:
+        return f"pickle-{int(os.path.getmtime(CACHED_DATA_PATH))}"
+    except OSError:
+        return None
+
+
+def load_search_index():
+    """Builds a SearchIndex from disk without touching the one being served."""
+    started = time.perf_counter()
+    attempted = disk_version()
+    if current_version(SEARCH_STORE_DIR) is not None:
+        print(f"⏳ Mapping search store from: {SEARCH_STORE_DIR}", file=sys.stderr)
+        try:
+            store = open_store(SEARCH_STORE_DIR)
+            # Embeddings, plant records and keyword postings are read-only memory maps
+            # shared through the page cache by every worker; nothing is parsed up front.
+            index = SearchIndex(
+                store.version, "store", store.plants, store.embeddings, store.keyword_index,
+                load_ann_index(store), time.perf_counter() - started, attempted,
+            )
+            print(f"✅ Search store {store.version} mapped. {len(index.plants)} plants.", file=sys.stderr)
+            return index
+        except Exception as e:
+            print(f"❌ ERROR opening search store: {e}. Trying legacy cache.", file=sys.stderr)
+
+    print(f"⏳ Loading cached search data from: {CACHED_DATA_PATH}", file=sys.stderr)
+    try:
+        version = f"pickle-{int(os.path.getmtime(CACHED_DATA_PATH))}"
+        with open(CACHED_DATA_PATH, "rb") as f:
+            combined_data = pickle.load(f)
+
+        plants = combined_data["plants_data"]
+        index = SearchIndex(
+            version, "pickle", plants,
+            # Normalize once so per-query cosine similarity is a single matrix-vector product
+            normalize_rows(combined_data["embeddings"]),
+            # Precompute medicinal keyword postings once instead of re-tokenizing every plant per query
+            KeywordIndex.from_plants(plants),
+            None, time.perf_counter() - started, attempted,
+        )
+        print(f"✅ Cached data loaded successfully. {len(plants)} plants.", file=sys.stderr)
+        return index
+    except FileNotFoundError:
+        print(f"❌ ERROR: Cached data file not found at {CACHED_DATA_PATH}. Search disabled.", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ ERROR loading cached data: {e}. Search disabled.", file=sys.stderr)
+    return None
+
+
+def load_ann_index(store):
+    """Loads the store's IVF index if the corpus is large enough to benefit from it."""
+    if len(store.plants) < ANN_MIN_CORPUS:
+        return None
+    try:
+        index = store.load_ann_index(nprobe=ANN_NPROBE)
+    except Exception as e:
+        print(f"⚠️ Could not load ANN index ({e}). Using exact search.", file=sys.stderr)
+        return None
+    if index is None:
+        return None
+    if index.size != len(store.plants):
+        print(f"⚠️ ANN index covers {index.size} plants, data has {len(store.plants)}. Using exact search.", file=sys.stderr)
+        return None
+    print(f"✅ ANN index loaded ({index.nlist} lists, nprobe={ANN_NPROBE}).", file=sys.stderr)
+    return index
+
+
+def refresh_search_index(force=False):
+    """Loads and swaps in the on-disk index if its version changed. Returns True if swapped."""
+    global _current_index
+    with _reload_lock:
+        served = _current_index
+        # Compare with what was on disk at load time, so a store that fails to open is
+        # not retried (and the pickle reloaded) on every poll until a new one is published
+        if not force and served is not None and served.disk_version == disk_version():
+            return False
+        index = load_search_index()
+        if index is None:
+            return False  # keep serving whatever we had
+        _current_index = index
+        return True
+
+
+def _reload_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            if refresh_search_index():
+                print(f"🔄 Search index hot-reloaded: {_current_index.version}", file=sys.stderr)
+        except Exception as e:
+            print(f"⚠️ Search index reload check failed: {e}", file=sys.stderr)
+
+
+def start_reloader(interval=SEARCH_RELOAD_INTERVAL):
+    """Starts the background thread that picks up newly published indexes (once per process)."""
+    global _reloader_started
+    if interval <= 0 or _reloader_started:
+        return
+    _reloader_started = True
+    threading.Thread(target=_reload_loop, args=(interval,), name="search-index-reloader", daemon=True).start()
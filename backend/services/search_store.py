@@ -0,0 +1,186 @@
+import json
+import mmap
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.ann_index import IVFIndex
+from services.keyword_index import KeywordIndex
+from services.search_ranking import normalize_rows
+
+load_dotenv()
+
+# ===== CONFIG =====
+# Versioned on-disk search index written by generate_embeddings.py:
+#   search_index/CURRENT                 name of the version being served
+#   search_index/<version>/manifest.json counts, dimensions, model, created_at
+#   search_index/<version>/embeddings.f32 raw row-major float32 matrix (L2-normalized)
+#   search_index/<version>/plants.jsonl  one plant document per line
+#   search_index/<version>/plants.idx    uint64 byte offsets of each line (count + 1 entries)
+#   search_index/<version>/keywords.*    medicinal keyword postings (see KeywordIndex.to_arrays)
+#   search_index/<version>/content_hashes.npy  sha1 of each plant's embedded text (incremental rebuilds)
+#   search_index/<version>/ann_*.npy     IVF index (see IVFIndex)
+STORE_DIR = os.getenv(
+    "SEARCH_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "search_index"),
+)
+KEEP_VERSIONS = 2
+FORMAT_VERSION = 1
+
+
+class PlantRecords(Sequence):
+    """Read-only list of plant documents decoded on demand from a memory-mapped JSONL file."""
+
+    def __init__(self, jsonl_path, idx_path):
+        self._offsets = np.memmap(idx_path, dtype=np.uint64, mode="r")
+        with open(jsonl_path, "rb") as f:
+            # mmap of an empty file is not allowed
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("plant index out of range")
+        return json.loads(self._buf[int(self._offsets[i]):int(self._offsets[i + 1])])
+
+
+class SearchStore:
+    """One opened, read-only version of the search index."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        count, dim = self.manifest["count"], self.manifest["dim"]
+
+        self.plants = PlantRecords(os.path.join(directory, "plants.jsonl"), os.path.join(directory, "plants.idx"))
+        if count:
+            self.embeddings = np.memmap(
+                os.path.join(directory, "embeddings.f32"), dtype=np.float32, mode="r", shape=(count, dim)
+            )
+        else:
+            self.embeddings = np.zeros((0, dim), dtype=np.float32)
+
+        with open(os.path.join(directory, "keywords.json")) as f:
+            vocab = json.load(f)
+        self.keyword_index = KeywordIndex.from_arrays(
+            vocab,
+            np.load(os.path.join(directory, "keywords_offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, "keywords_ids.npy"), mmap_mode="r"),
+            count,
+        )
+
+    def content_hashes(self):
+        """sha1 hex digest of the text each row was embedded from, or None for stores without them."""
+        path = os.path.join(self.directory, "content_hashes.npy")
+        if not os.path.exists(path):
+            return None
+        return [h.decode() for h in np.load(path)]
+
+    def load_ann_index(self, nprobe):
+        if not IVFIndex.exists(self.directory):
+            return None
+        return IVFIndex.load(self.directory, nprobe=nprobe)
+
+
+def current_version(store_dir=STORE_DIR):
+    """Name of the version currently marked as served, or None if no store was written yet."""
+    try:
+        with open(os.path.join(store_dir, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_store(store_dir=STORE_DIR, version=None):
+    version = version or current_version(store_dir)
+    if version is None:
+        raise FileNotFoundError(f"No search index found in {store_dir}")
+    return SearchStore(os.path.join(store_dir, version))
+
+
+def write_store(plants, embeddings, store_dir=STORE_DIR, model=None, build_ann=True, content_hashes=None):
+    """Writes a new store version and atomically marks it as current. Returns the version name.
+
+    ``content_hashes`` (one per plant) lets the next run reuse unchanged embeddings.
+    """
+    embeddings = normalize_rows(embeddings)
+    if len(plants) != len(embeddings):
+        raise ValueError(f"{len(plants)} plants but {len(embeddings)} embeddings")
+
+    version = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:6]
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_dir = os.path.join(store_dir, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    embeddings.tofile(os.path.join(tmp_dir, "embeddings.f32"))
+
+    offsets = [0]
+    with open(os.path.join(tmp_dir, "plants.jsonl"), "wb") as f:
+        for plant in plants:
+            line = json.dumps(plant, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.asarray(offsets, dtype=np.uint64).tofile(os.path.join(tmp_dir, "plants.idx"))
+
+    vocab, kw_offsets, kw_ids = KeywordIndex.from_plants(plants).to_arrays()
+    with open(os.path.join(tmp_dir, "keywords.json"), "w") as f:
+        json.dump(vocab, f)
+    np.save(os.path.join(tmp_dir, "keywords_offsets.npy"), kw_offsets)
+    np.save(os.path.join(tmp_dir, "keywords_ids.npy"), kw_ids)
+
+    if content_hashes is not None:
+        np.save(os.path.join(tmp_dir, "content_hashes.npy"), np.asarray(content_hashes, dtype="S40"))
+
+    if build_ann and len(embeddings):
+        IVFIndex.build(embeddings).save(tmp_dir)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "count": len(plants),
+        "dim": int(embeddings.shape[1]),
+        "dtype": "float32",
+        "normalized": True,
+        "model": model,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.rename(tmp_dir, os.path.join(store_dir, version))
+    _write_current(store_dir, version)
+    _prune_versions(store_dir, keep=KEEP_VERSIONS)
+    return version
+
+
+def _write_current(store_dir, version):
+    tmp_path = os.path.join(store_dir, f".CURRENT.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(store_dir, "CURRENT"))
+
+
+def _prune_versions(store_dir, keep):
+    # Workers may still have an older version mapped; POSIX keeps those pages valid after unlink.
+    versions = sorted(
+        name for name in os.listdir(store_dir)
+        if not name.startswith(".") and os.path.isdir(os.path.join(store_dir, name))
+    )
+    current = current_version(store_dir)
+    for name in versions[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import folium
+import geopandas as gpd
+import pandas as pd
+from dotenv import load_dotenv
+
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+
+load_dotenv()
+
+# ===== CONFIG =====
+GEOJSON_PATH = os.getenv(
+    "INDIA_GEOJSON_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "india.geojson"),
+)
+# Douglas-Peucker tolerance in degrees (~1 km); state borders stay recognisable at zoom 5
+MAP_SIMPLIFY_TOLERANCE = float(os.getenv("MAP_SIMPLIFY_TOLERANCE", "0.01"))
+# Coordinate grid of the downloadable geometry in degrees (~110 m, well below the simplification)
+GEOMETRY_PRECISION = float(os.getenv("MAP_GEOMETRY_PRECISION", "0.001"))
+MAP_CACHE_SIZE = int(os.getenv("MAP_CACHE_SIZE", "256"))
+MAP_CACHE_TTL = float(os.getenv("MAP_CACHE_TTL", "3600"))
+
+
+class StateGeometry:
+    """India state boundaries, read and simplified once per process."""
+
+    def __init__(self, path=GEOJSON_PATH, tolerance=MAP_SIMPLIFY_TOLERANCE):
+        gdf = gpd.read_file(path)[["NAME_1", "geometry"]]
+        gdf["geometry"] = gdf.geometry.simplify(tolerance, preserve_topology=True)
+        self.states = gdf
+        self.tolerance = tolerance
+        with open(path, "rb") as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+        # Changes whenever the source file or the simplification does
+        self.version = hashlib.sha1(f"{source_hash}:{tolerance}:{GEOMETRY_PRECISION}".encode()).hexdigest()[:12]
+        self._geojson = None
+        self._geojson_gzip = None
+
+    def geojson_bytes(self):
+        """Compact, quantized GeoJSON of the simplified states (built once), plus its gzip encoding."""
+        if self._geojson is None:
+            quantized = self.states.copy()
+            quantized["geometry"] = quantized.geometry.set_precision(GEOMETRY_PRECISION)
+            collection = json.loads(quantized.to_json(drop_id=True))
+            body = json.dumps(collection, separators=(",", ":")).encode("utf-8")
+            self._geojson_gzip = gzip.compress(body, compresslevel=9)
+            self._geojson = body
+        return self._geojson, self._geojson_gzip
+
+    def with_values(self, where_grown):
+        """States with a ``Value`` column from ``{state: value}``; states not listed get 0."""
+        df = pd.DataFrame(list(where_grown.items()), columns=["NAME_1", "Value"])
+        merged = self.states.merge(df, on="NAME_1", how="left")
+        merged["Value"] = merged["Value"].fillna(0)
+        return merged
+
+
+_geometry = None
+_geometry_lock = threading.Lock()
+
+
+def get_state_geometry():
+    """The process-wide StateGeometry (raises FileNotFoundError if the GeoJSON is missing)."""
+    global _geometry
+    if _geometry is None:
+        with _geometry_lock:
+            if _geometry is None:
+                if not os.path.exists(GEOJSON_PATH):
+                    raise FileNotFoundError(f"GeoJSON file not found at {GEOJSON_PATH}")
+                _geometry = StateGeometry()
+                print(f"✅ State geometry loaded ({len(_geometry.states)} states, version {_geometry.version})", file=sys.stderr)
+    return _geometry
+
+
+def heatmap_values(where_grown):
+    """``{state: value}`` for the states with a numeric value, as sent by the JSON data mode."""
+    values = {}
+    for state, value in where_grown.items():
+        try:
+            values[str(state)] = round(float(value), 4)
+        except (TypeError, ValueError):
+            continue
+    return values
+
+
+def render_heatmap_html(plant_name, where_grown):
+    """Folium choropleth of ``where_grown`` as a standalone HTML page (no temp file)."""
+    merged = get_state_geometry().with_values(where_grown)
+
+    # Create Folium map centered on India
+    m = folium.Map(location=[20.5937, 78.9629], zoom_start=5, tiles="OpenStreetMap")
+
+    # Add choropleth layer
+    choropleth = folium.Choropleth(
+        geo_data=merged,
+        name=f"{plant_name} Growth Index",
+        data=merged,
+        columns=["NAME_1", "Value"],
+        key_on="feature.properties.NAME_1",
+        fill_color="YlGnBu",
+        fill_opacity=0.8,
+        line_opacity=0.3,
+        legend_name=f"{plant_name} Growth Index",
+        nan_fill_color="gray",
+        nan_fill_opacity=0.4
+    ).add_to(m)
+
+    # Add tooltips
+    folium.GeoJsonTooltip(
+        fields=["NAME_1", "Value"],
+        aliases=["State:", "Growth Index:"],
+        localize=True,
+        sticky=True,
+        labels=True,
+        style="background-color: #F0EFEF; border: 2px solid black; border-radius: 3px; box-shadow: 3px;"
+    ).add_to(choropleth.geojson)
+
+    # Add layer control
+    folium.LayerControl().add_to(m)
+    return m.get_root().render()
+
+
+class HeatmapCache:
+    """Rendered heatmap pages keyed by plant content hash and geometry version."""
+
+    def __init__(self, maxsize=MAP_CACHE_SIZE, ttl=MAP_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight = SingleFlight()
+
+    def key(self, content_hash):
+        return f"{content_hash}:{get_state_geometry().version}"
+
+    def get(self, plant_name, where_grown, content_hash):
+        """Returns ``(html, etag)`` for the plant, rendering it once per content version."""
+        key = self.key(content_hash)
+        html = self._cache.get(key)
+        if html is None:
+            html = self._in_flight.do(key, self._render, key, plant_name, where_grown)
+        return html, hashlib.sha1(key.encode()).hexdigest()
+
+    def _render(self, key, plant_name, where_grown):
+        html = render_heatmap_html(plant_name, where_grown)
+        self._cache.set(key, html)
+        return html
+
+    def stats(self):
+        return self._cache.stats()
+
+
+heatmaps = HeatmapCache()
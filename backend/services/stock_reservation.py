@@ -0,0 +1,123 @@
+import logging
+import uuid
+from collections import defaultdict
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Products touched by an in-flight reservation carry its id here until it settles
+RESERVATION_FIELD = "_reservations"
+
+
+class ReservationFailed(Exception):
+    """Some lines could not be reserved; nothing was reserved."""
+
+    def __init__(self, missing, insufficient):
+        self.missing = missing            # names of products that no longer exist
+        self.insufficient = insufficient  # names of products without enough stock
+        names = ", ".join(missing or insufficient)
+        super().__init__(f"Product not found: {names}" if missing else f"Insufficient stock for {names}")
+
+
+class Reservation:
+    """Stock taken for one order: ``[(collection, {product_id: quantity})]``."""
+
+    def __init__(self, reservation_id, lines):
+        self.id = reservation_id
+        self.lines = lines
+
+
+def group_lines(items, collection_for):
+    """``[(collection, {product_id: quantity}, {product_id: name})]`` with repeated products merged.
+
+    Lines whose category has no collection are skipped, as before.
+    """
+    grouped = {}
+    for item in items:
+        collection = collection_for(item.get("category"))
+        if collection is None:
+            continue
+        quantity = int(item.get("quantity", 0))
+        if quantity < 1:
+            raise ValueError(f"Invalid quantity for {item.get('name', 'unknown')}")
+        quantities, names = grouped.setdefault(collection.name, (collection, defaultdict(int), {}))[1:]
+        quantities[item["product_id"]] += quantity
+        names.setdefault(item["product_id"], item.get("name") or str(item["product_id"]))
+    return list(grouped.values())
+
+
+def _bulk_restore(collection, quantities, reservation_id):
+    collection.bulk_write([
+        UpdateOne({"_id": product_id, RESERVATION_FIELD: reservation_id},
+                  {"$inc": {"stock": quantity}, "$pull": {RESERVATION_FIELD: reservation_id}})
+        for product_id, quantity in quantities.items()
+    ], ordered=False)
+
+
+def _taken(collection, quantities, reservation_id):
+    """The part of ``quantities`` this reservation actually decremented."""
+    taken = {doc["_id"] for doc in collection.find(
+        {"_id": {"$in": list(quantities)}, RESERVATION_FIELD: reservation_id}, {"_id": 1})}
+    return {product_id: quantity for product_id, quantity in quantities.items() if product_id in taken}
+
+
+def _rollback(reserved, reservation_id):
+    for collection, quantities in reserved:
+        if not quantities:
+            continue
+        try:
+            _bulk_restore(collection, quantities, reservation_id)
+        except Exception as e:
+            logger.error(f"❌ Failed to roll back reservation {reservation_id} in {collection.name}: {e} ({dict(quantities)})")
+            raise
+
+
+def reserve_stock(items, collection_for):
+    """Takes the stock for every line or for none of them.
+
+    Each collection gets one unordered ``bulk_write`` whose updates only match while
+    ``stock >= quantity``, so the check and the decrement are one atomic step per
+    product and concurrent checkouts cannot oversell. If any line does not match,
+    the lines already taken (found by the reservation id they were tagged with) are
+    put back and ReservationFailed says which products were short or missing.
+    """
+    reservation_id = uuid.uuid4().hex
+    reserved = []
+    for collection, quantities, names in group_lines(items, collection_for):
+        try:
+            result = collection.bulk_write([
+                UpdateOne({"_id": product_id, "stock": {"$gte": quantity}},
+                          {"$inc": {"stock": -quantity}, "$push": {RESERVATION_FIELD: reservation_id}})
+                for product_id, quantity in quantities.items()
+            ], ordered=False)
+        except Exception:
+            reserved.append((collection, _taken(collection, quantities, reservation_id)))
+            _rollback(reserved, reservation_id)
+            raise
+        if result.matched_count == len(quantities):
+            reserved.append((collection, quantities))
+            continue
+
+        taken = _taken(collection, quantities, reservation_id)
+        reserved.append((collection, taken))
+        _rollback(reserved, reservation_id)
+        short = [product_id for product_id in quantities if product_id not in taken]
+        existing = {doc["_id"] for doc in collection.find({"_id": {"$in": short}}, {"_id": 1})}
+        raise ReservationFailed(
+            missing=[names[p] for p in short if p not in existing],
+            insufficient=[names[p] for p in short if p in existing],
+        )
+
+    for collection, quantities in reserved:
+        collection.update_many({"_id": {"$in": list(quantities)}}, {"$pull": {RESERVATION_FIELD: reservation_id}})
+    return Reservation(reservation_id, reserved)
+
+
+def release_stock(reservation):
+    """Puts a reservation's stock back, e.g. when the order could not be saved."""
+    for collection, quantities in reservation.lines:
+        collection.bulk_write([
+            UpdateOne({"_id": product_id}, {"$inc": {"stock": quantity}})
+            for product_id, quantity in quantities.items()
+        ], ordered=False)
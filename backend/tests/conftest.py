@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the backend modules the way app.py does. From the backend directory:
+#   pip install -r requirements-dev.txt
+#   python -m pytest -q tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,152 @@
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image as PILImage
+from requests.exceptions import ConnectTimeout
+
+from services.image_cache import BadImage, PlantImageCache, make_thumbnail, url_key
+
+FIRST = "https://images.example.com/first.jpg"
+SECOND = "https://images.example.com/second.jpg"
+
+
+def jpeg(color):
+    out = BytesIO()
+    PILImage.new("RGB", (32, 32), color).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class FakeHost:
+    """Stands in for the image hosts: ``responses`` maps a URL to bytes or an exception."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def __call__(self, url):
+        self.requested.append(url)
+        response = self.responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def make_images(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        cache = PlantImageCache(cache_dir=str(tmp_path), max_bytes=10 * 1024 * 1024, deadline=2, **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        if cache._pool is not None:
+            cache._pool.shutdown(wait=True)
+
+
+@pytest.fixture
+def images(make_images):
+    return make_images()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "background download did not finish"
+        time.sleep(0.01)
+
+
+def test_cached_later_url_downloads_earlier_ones_and_settles(images, monkeypatch):
+    host = FakeHost({FIRST: jpeg("green")})
+    monkeypatch.setattr(images, "_download", host)
+    second = make_thumbnail(jpeg("red"))
+    images.cache.set(url_key(SECOND), second)
+
+    image, settled = images.thumbnail([FIRST, SECOND])
+    assert image == second and not settled
+
+    wait_until(lambda: images.cache.get(url_key(FIRST)) is not None)
+    image, settled = images.thumbnail([FIRST, SECOND])
+    assert image == images.cache.get(url_key(FIRST)) and settled
+    assert host.requested == [FIRST]
+
+
+def test_cached_later_url_settles_once_earlier_one_is_known_bad(images, monkeypatch):
+    host = FakeHost({FIRST: BadImage("HTTP 404")})
+    monkeypatch.setattr(images, "_download", host)
+    second = make_thumbnail(jpeg("red"))
+    images.cache.set(url_key(SECOND), second)
+
+    assert images.thumbnail([FIRST, SECOND]) == (second, False)
+    wait_until(lambda: images._bad.get(url_key(FIRST)) == "bad")
+    assert images.thumbnail([FIRST, SECOND]) == (second, True)
+
+
+def test_transient_failure_is_not_settled(images, monkeypatch):
+    host = FakeHost({FIRST: ConnectionError("reset"), SECOND: BadImage("not an image")})
+    monkeypatch.setattr(images, "_download", host)
+
+    assert images.thumbnail([FIRST, SECOND]) == (None, False)
+    assert images.thumbnail([FIRST, SECOND]) == (None, False)  # remembered, not downloaded again
+    assert sorted(host.requested) == [FIRST, SECOND]
+
+
+def test_earlier_url_still_downloading_is_not_settled(images, monkeypatch):
+    host = FakeHost({FIRST: jpeg("green"), SECOND: jpeg("red")})
+    first_released = threading.Event()
+
+    def download(url):
+        if url == FIRST:
+            first_released.wait(5)
+        return host(url)
+
+    monkeypatch.setattr(images, "_download", download)
+    image, settled = images.thumbnail([FIRST, SECOND])
+    assert image == images.cache.get(url_key(SECOND)) and not settled
+    first_released.set()
+    wait_until(lambda: images.cache.get(url_key(FIRST)) is not None)
+    assert images.thumbnail([FIRST, SECOND]) == (images.cache.get(url_key(FIRST)), True)
+
+
+def test_timing_out_first_url_stops_holding_back_a_cached_second(make_images, monkeypatch):
+    # failed_ttl=0: every call may retry the failed URL, as after FAILED_IMAGE_TTL
+    images = make_images(failed_ttl=0, max_failures=2)
+    host = FakeHost({FIRST: ConnectTimeout("timed out")})
+    monkeypatch.setattr(images, "_download", host)
+    second = make_thumbnail(jpeg("red"))
+    images.cache.set(url_key(SECOND), second)
+
+    assert images.thumbnail([FIRST, SECOND]) == (second, False)
+    wait_until(lambda: images._failures.get(url_key(FIRST)) == 1 and not images._in_flight._calls)
+    assert images.thumbnail([FIRST, SECOND]) == (second, False)
+    wait_until(lambda: images._bad.get(url_key(FIRST)) == "bad")
+
+    assert images.thumbnail([FIRST, SECOND]) == (second, True)
+    assert host.requested == [FIRST, FIRST]
+
+
+def test_dead_only_url_settles_after_repeated_failures(make_images, monkeypatch):
+    images = make_images(failed_ttl=0, max_failures=2)
+    host = FakeHost({FIRST: ConnectTimeout("timed out")})
+    monkeypatch.setattr(images, "_download", host)
+
+    assert images.thumbnail([FIRST]) == (None, False)
+    assert images.thumbnail([FIRST]) == (None, True)
+    assert images.thumbnail([FIRST]) == (None, True)
+    assert host.requested == [FIRST, FIRST]
+
+
+def test_success_resets_the_failure_count(make_images, monkeypatch):
+    images = make_images(failed_ttl=0, max_failures=2)
+    responses = {FIRST: ConnectTimeout("timed out")}
+    monkeypatch.setattr(images, "_download", FakeHost(responses))
+
+    assert images.thumbnail([FIRST]) == (None, False)
+    responses[FIRST] = jpeg("green")
+    image, settled = images.thumbnail([FIRST])
+    assert image is not None and settled
+    assert images._failures.get(url_key(FIRST)) is None
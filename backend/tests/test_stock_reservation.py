@@ -0,0 +1,121 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+
+from services.stock_reservation import RESERVATION_FIELD, ReservationFailed, release_stock, reserve_stock
+
+
+class AtomicCollection:
+    """mongomock collection whose operations are atomic per call, like a server's.
+
+    mongomock's bulk_write does not accept current pymongo UpdateOne objects, so the
+    updates are applied one by one, each atomic on its own as on a server.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.Lock()
+        self.name = collection.name
+
+    def bulk_write(self, requests, ordered=True):
+        matched = 0
+        for op in requests:
+            with self._lock:
+                matched += self._collection.update_one(op._filter, op._doc).matched_count
+        return SimpleNamespace(matched_count=matched)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        def call(*args, **kwargs):
+            with self._lock:
+                result = method(*args, **kwargs)
+                return list(result) if name == "find" else result
+        return call
+
+
+@pytest.fixture
+def collections():
+    db = mongomock.MongoClient()["shop"]
+    collections = {"plant": AtomicCollection(db["plants"]), "seed": AtomicCollection(db["seeds"])}
+    collections["plant"].insert_many([{"_id": "tulsi", "name": "Tulsi", "stock": 10},
+                                      {"_id": "neem", "name": "Neem", "stock": 7}])
+    collections["seed"].insert_many([{"_id": "basil", "name": "Basil seeds", "stock": 5}])
+    return collections
+
+
+def line(product_id, category, quantity):
+    return {"product_id": product_id, "category": category, "quantity": quantity, "name": product_id}
+
+
+def stock(collections, category, product_id):
+    return collections[category].find_one({"_id": product_id})["stock"]
+
+
+def no_reservation_markers(collections):
+    return all(not collection.find({RESERVATION_FIELD: {"$exists": True, "$ne": []}})
+               for collection in collections.values())
+
+
+def test_parallel_reservations_never_oversell(collections):
+    initial = {("plant", "tulsi"): 10, ("plant", "neem"): 7, ("seed", "basil"): 5}
+    rng = random.Random(3)
+    orders = [[line(product_id, category, rng.randint(1, 3))
+               for category, product_id in rng.sample(sorted(initial), rng.randint(1, 3))]
+              for _ in range(200)]
+
+    def place(lines):
+        try:
+            reserve_stock(lines, collections.get)
+            return lines
+        except ReservationFailed:
+            return None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        placed = [lines for lines in pool.map(place, orders) if lines]
+
+    sold = {key: 0 for key in initial}
+    for lines in placed:
+        for item in lines:
+            sold[(item["category"], item["product_id"])] += item["quantity"]
+    for (category, product_id), units in initial.items():
+        left = stock(collections, category, product_id)
+        assert left >= 0
+        assert units - left == sold[(category, product_id)]
+    assert placed and len(placed) < len(orders)
+    assert no_reservation_markers(collections)
+
+
+def test_short_later_line_rolls_back_earlier_lines(collections):
+    lines = [line("tulsi", "plant", 4), line("neem", "plant", 2), line("basil", "seed", 6)]
+
+    with pytest.raises(ReservationFailed) as failed:
+        reserve_stock(lines, collections.get)
+
+    assert failed.value.insufficient == ["basil"] and failed.value.missing == []
+    assert stock(collections, "plant", "tulsi") == 10
+    assert stock(collections, "plant", "neem") == 7
+    assert stock(collections, "seed", "basil") == 5
+    assert no_reservation_markers(collections)
+
+
+def test_missing_product_is_reported_and_nothing_reserved(collections):
+    lines = [line("tulsi", "plant", 1), line("ghost", "plant", 1)]
+
+    with pytest.raises(ReservationFailed) as failed:
+        reserve_stock(lines, collections.get)
+
+    assert failed.value.missing == ["ghost"] and failed.value.insufficient == []
+    assert stock(collections, "plant", "tulsi") == 10
+
+
+def test_repeated_lines_are_merged_and_released(collections):
+    reservation = reserve_stock([line("neem", "plant", 3), line("neem", "plant", 4)], collections.get)
+    assert stock(collections, "plant", "neem") == 0
+
+    release_stock(reservation)
+    assert stock(collections, "plant", "neem") == 7